@@ -1,131 +1,412 @@
-import json
 import os
+import sys
+import argparse
+import bisect
 import logging
+from collections import Counter
 from datetime import datetime
-from scraper.Scrap import fetch_articles_enhanced
-from scraper.translate import TranslationService
-from scraper.analyse import analyze_headers
+from scraper.Scrap import (EnhancedScraper, ArticleFetcher, ENGINES, iter_discovered_articles,
+                           finalize_article, download_first_image)
+from scraper.pipeline import Pipeline, Stage
+from scraper.config import (PIPELINE_WORKERS, PIPELINE_QUEUE_SIZE, STORE_BATCH_SIZE,
+                            WEBDRIVER_COMMAND_BUDGET, WEBDRIVER_BUDGET_ACTION)
+from scraper.translate import TranslationService, TranslationCache
+from scraper.analyse import analyze_store, WordFrequencyEngine
+from scraper.sink import JsonlSink
+from scraper.store import ArticleStore, processing_metadata
+from scraper.search import SearchIndex
+from scraper.tracing import tracer
 
-# Setup enhanced logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('data/scraping_enhanced.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
-def save_enhanced_data_to_json(articles, translated_titles, filename_prefix="elpais_enhanced_data"):
-    """Save enhanced scraped data with additional metadata"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    os.makedirs("data", exist_ok=True)
-    
-    # Enhanced articles file with additional metadata
-    articles_file = f"data/{filename_prefix}_articles_{timestamp}.json"
-    enhanced_articles = []
-    
-    for i, (article, translated) in enumerate(zip(articles, translated_titles)):
-        enhanced_article = {
-            **article,  # Original article data
-            "article_number": i + 1,
-            "translated_title": translated,
-            "processing_metadata": {
-                "content_extracted": len(article.get('content', '')) > 50 and article.get('content') != "Content could not be extracted",
-                "image_downloaded": article.get('image') is not None,
-                "paywall_detected": article.get('paywall_detected', False),
-                "paywall_confidence": article.get('paywall_confidence', 0.0),
-                "bypass_method": article.get('bypass_method'),
-                "extraction_method": article.get('extraction_method'),
-                "content_quality_score": article.get('content_score', 0.0)
-            }
-        }
-        enhanced_articles.append(enhanced_article)
-    
-    with open(articles_file, 'w', encoding='utf-8') as f:
-        json.dump(enhanced_articles, f, ensure_ascii=False, indent=2)
-    
-    # Translations summary file
-    translations_file = f"data/{filename_prefix}_translations_{timestamp}.json"
-    translation_data = []
-    for i, (article, translated) in enumerate(zip(articles, translated_titles)):
-        translation_data.append({
-            "article_number": i + 1,
-            "original_title": article['title'],
-            "translated_title": translated,
-            "url": article.get('url', ''),
-            "translation_successful": article['title'].lower() != translated.lower()
-        })
-    
-    with open(translations_file, 'w', encoding='utf-8') as f:
-        json.dump(translation_data, f, ensure_ascii=False, indent=2)
+def setup_logging(log_file='data/scraping_enhanced.log'):
+    """Setup enhanced logging; called from main() so importing this module has no side effects"""
+    os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
+def build_enhanced_article(article, translated, article_number):
+    """Article record with processing metadata, as written to the articles file"""
+    return {
+        **article,  # Original article data; Article records are only turned into a dict here
+        "article_number": article_number,
+        "translated_title": translated,
+        "processing_metadata": processing_metadata(article)
+    }
+
+def build_translation_record(article, translated, article_number, skip_reason=None):
+    """Translation summary record, as written to the translations file"""
+    return {
+        "article_number": article_number,
+        "original_title": article['title'],
+        "translated_title": translated,
+        "url": article.get('url', ''),
+        "translation_successful": article['title'].lower() != translated.lower() or skip_reason is not None,
+        "translation_skipped": skip_reason
+    }
+
+class EnhancedDataWriter:
+    """Stream article and translation records to JSON Lines files as articles complete"""
+    
+    def __init__(self, filename_prefix="elpais_enhanced_data", compression=None, output_dir="data"):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.articles_sink = JsonlSink(f"{output_dir}/{filename_prefix}_articles_{timestamp}.jsonl", compression)
+        self.translations_sink = JsonlSink(f"{output_dir}/{filename_prefix}_translations_{timestamp}.jsonl", compression)
+        self.count = 0
+    
+    def write(self, article, translated, skip_reason=None):
+        self.count += 1
+        self.articles_sink.write(build_enhanced_article(article, translated, self.count))
+        self.translations_sink.write(build_translation_record(article, translated, self.count, skip_reason))
+    
+    def close(self):
+        self.articles_sink.close()
+        self.translations_sink.close()
+        return self.articles_sink.path, self.translations_sink.path
+
+def save_enhanced_data_to_json(articles, translated_titles, filename_prefix="elpais_enhanced_data",
+                               skipped_translations=None, compression=None):
+    """Save enhanced scraped data with additional metadata as JSON Lines"""
+    skipped_translations = skipped_translations or {}
+    writer = EnhancedDataWriter(filename_prefix, compression)
+    try:
+        for article, translated in zip(articles, translated_titles):
+            writer.write(article, translated, skipped_translations.get(article['title']))
+    finally:
+        articles_file, translations_file = writer.close()
     
     logger.info(f"Enhanced data saved to {articles_file} and {translations_file}")
     return articles_file, translations_file
 
-def display_enhanced_results(articles, translated_titles, repeated_words):
+class RunSummary:
+    """Run statistics accumulated one article at a time
+    
+    The pipeline sink calls add() as each article completes, so the
+    reports at the end read counters instead of walking the article list,
+    and nothing but the first list_limit articles has to be kept for them.
+    """
+    
+    QUALITY_BINS = 10
+    LENGTH_BUCKETS = (500, 1000, 2000, 5000)
+    
+    def __init__(self, list_limit=50):
+        self.list_limit = list_limit
+        self.listed = []
+        self.articles = 0
+        self.content_extracted = 0
+        self.images = 0
+        self.translated = 0
+        self.translations_identical = 0
+        self.translations_skipped = 0
+        self.paywalls = 0
+        self.bypasses = 0
+        self.duplicates = 0
+        self.quality_sum = 0.0
+        self.quality_scored = 0
+        self.quality_histogram = [0] * self.QUALITY_BINS
+        self.length_histogram = [0] * (len(self.LENGTH_BUCKETS) + 1)
+        self.extraction_methods = Counter()
+        self.bypass_methods = Counter()
+        self.words = WordFrequencyEngine()
+    
+    def add(self, index, article, translated=None, skip_reason=None):
+        metadata = processing_metadata(article)
+        content = article.get('content') or ''
+        score = article.get('content_score', 0.0) or 0.0
+        title = article.get('title') or ''
+        
+        self.articles += 1
+        self.content_extracted += metadata['content_extracted']
+        self.images += bool(article.get('image'))
+        self.paywalls += bool(metadata['paywall_detected'])
+        self.bypasses += bool(metadata['bypass_method'] and metadata['bypass_method'] != 'direct_access')
+        self.duplicates += bool(article.get('duplicate_of'))
+        self.quality_sum += score
+        self.quality_scored += bool(score)
+        self.quality_histogram[min(int(score * self.QUALITY_BINS), self.QUALITY_BINS - 1)] += 1
+        self.length_histogram[bisect.bisect_right(self.LENGTH_BUCKETS, len(content))] += 1
+        self.extraction_methods[article.get('extraction_method', 'unknown')] += 1
+        if metadata['bypass_method']:
+            self.bypass_methods[metadata['bypass_method']] += 1
+        
+        if translated is not None:
+            if skip_reason is not None:
+                self.translations_skipped += 1
+            elif title.lower() == translated.lower():
+                self.translations_identical += 1
+            else:
+                self.translated += 1
+            self.words.consume([translated])
+        
+        if len(self.listed) < self.list_limit:
+            self.listed.append({
+                "index": index,
+                "title": title,
+                "content": content[:200],
+                "content_length": len(content),
+                "content_extracted": metadata['content_extracted'],
+                "content_score": score,
+                "extraction_method": article.get('extraction_method'),
+                "keywords": article.get('keywords'),
+                "error": article.get('error'),
+                "paywall_detected": metadata['paywall_detected'],
+                "paywall_confidence": metadata['paywall_confidence'],
+                "bypass_method": metadata['bypass_method'],
+                "url": article.get('url', 'N/A'),
+                "image": article.get('image'),
+                "translated": translated,
+                "skip_reason": skip_reason
+            })
+    
+    @property
+    def translations(self):
+        return self.translated + self.translations_identical + self.translations_skipped
+    
+    @property
+    def successful_translations(self):
+        return self.translated + self.translations_skipped
+    
+    @property
+    def average_quality(self):
+        """Mean content score over all articles"""
+        return self.quality_sum / self.articles if self.articles else 0.0
+    
+    @property
+    def average_scored_quality(self):
+        """Mean content score over the articles that got a non-zero score"""
+        return self.quality_sum / max(self.quality_scored, 1)
+    
+    def quality_distribution(self):
+        """(score range, count) for the non-empty quality histogram bins"""
+        width = 1 / self.QUALITY_BINS
+        return [(f"{i * width:.1f}-{(i + 1) * width:.1f}", count)
+                for i, count in enumerate(self.quality_histogram) if count]
+    
+    def length_distribution(self):
+        """(length range, count) for the non-empty content length buckets"""
+        bounds = (0,) + self.LENGTH_BUCKETS
+        labels = [f"{low}-{high - 1}" for low, high in zip(bounds, bounds[1:])] + [f"{bounds[-1]}+"]
+        return [(label, count) for label, count in zip(labels, self.length_histogram) if count]
+    
+    def repeated_words(self, min_count=3):
+        return self.words.repeated(min_count)
+    
+    def entries(self):
+        return sorted(self.listed, key=lambda entry: entry["index"])
+
+def run_article_pipeline(scraper, source, translator=None, writer=None, store=None, engine="selenium",
+                         workers=None, queue_size=PIPELINE_QUEUE_SIZE, download_images=True, existing_images=None,
+                         search_index=None, duplicates=None, duplicate_policy="link", keywords=None,
+                         summary=None, keep_articles=True, pending_translations=None, translate_bodies=False):
+    """Fetch, extract, translate and save articles as a staged pipeline
+    
+    source yields (title, link, index) tuples and feeds fetch -> extract ->
+    image -> translate -> sink, with bounded queues between the stages. The
+    image stage is left out when download_images is False (existing_images
+    maps index to an already stored image), the translate stage when there is
+    no translator. Saved articles are also added to search_index when one is
+    given. With a DuplicateIndex, near-duplicates of earlier articles are
+    dropped (duplicate_policy "skip") or kept with a duplicate_of link but no
+    image download or translation ("link"). A KeywordExtractor adds TF-IDF
+    keywords to each article before it is saved; only articles new to the
+    store count towards its document frequencies. Articles are upserted
+    into the store in transactions of STORE_BATCH_SIZE. Each saved article is also
+    added to summary, a RunSummary. pending_translations maps titles to
+    Futures from translator.submit_batch, started at discovery time; the
+    translate stage waits on those instead of translating again. With
+    translate_bodies the translate stage also translates each extracted
+    article body into translated_content. Returns the
+    articles and their translated titles in source order, plus per-stage
+    metrics; with keep_articles=False the lists stay empty so long runs don't
+    hold every article in memory.
+    """
+    workers = {**PIPELINE_WORKERS, **(workers or {})}
+    existing_images = existing_images or {}
+    results = []
+    counted_urls = set()
+    
+    def fetch(item, fetcher):
+        return fetcher.load(*item)
+    
+    def extract(page):
+        article = finalize_article(page, scraper)
+        if not download_images:
+            article["image"] = existing_images.get(page["index"])
+        return {
+            "index": page["index"],
+            "article": article,
+            "image_candidates": page.get("image_candidates", []),
+            "translated": None,
+            "skip_reason": None
+        }
+    
+    def dedupe(work):
+        article = work["article"]
+        if article.get("error"):
+            return work
+        match = duplicates.check(article)
+        if match is None:
+            return work
+        scraper.count_stat("duplicates")
+        original, similarity = match
+        if duplicate_policy == "skip":
+            logger.info(f"Skipping {article['url']}: near-duplicate of {original} ({similarity:.2f})")
+            return None
+        logger.info(f"Linking {article['url']} to {original} ({similarity:.2f})")
+        article["duplicate_of"] = original
+        article["duplicate_similarity"] = round(similarity, 3)
+        return work
+    
+    def extract_keywords(work):
+        article = work["article"]
+        if not article.get("error"):
+            # Linked duplicates and URLs already in the store (re-crawls,
+            # re-extraction) or earlier in this run (the sink's batch may not
+            # be written yet) get keywords without counting their text twice
+            url = ArticleStore.canonical_url(article["url"])
+            counted = (article.get("duplicate_of") or url in counted_urls
+                       or (store is not None and store.contains(article["url"])))
+            counted_urls.add(url)
+            keywords.extract_articles([article], update=not counted)
+        return work
+    
+    def download_image(work):
+        if not work["article"].get("error") and not work["article"].get("duplicate_of"):
+            work["article"]["image"] = download_first_image(work["image_candidates"], work["index"])
+        return work
+    
+    def translate(work):
+        title = work["article"]["title"]
+        pending = pending_translations.pop(title, None) if pending_translations is not None else None
+        if work["article"].get("duplicate_of"):
+            work["translated"], work["skip_reason"] = title, "duplicate"
+            return work
+        work["translated"] = pending.result() if pending is not None else translator.translate_text(title)
+        work["skip_reason"] = translator.skip_reason(title)
+        if translate_bodies and work["article"].get("content") and not work["article"].get("error"):
+            work["article"]["translated_content"] = translator.translate_long_text(work["article"]["content"])
+        return work
+    
+    def sink(work, batch):
+        if writer is not None:
+            writer.write(work["article"], work["translated"], work["skip_reason"])
+        if store is not None:
+            batch.append((work["article"], work["translated"], work["skip_reason"]))
+            if len(batch) >= STORE_BATCH_SIZE:
+                flush_store(batch)
+        if search_index is not None and not work["article"].get("error"):
+            search_index.add_article(work["article"])
+        if summary is not None:
+            summary.add(work["index"], work["article"], work["translated"], work["skip_reason"])
+        if keep_articles:
+            results.append(work)
+        return work
+    
+    def flush_store(batch):
+        if batch:
+            store.upsert_many(batch)
+            batch.clear()
+    
+    stages = [
+        Stage("fetch", fetch, workers["fetch"], setup=lambda: ArticleFetcher(scraper, engine),
+              teardown=lambda fetcher: fetcher.close()),
+        Stage("extract", extract, workers["extract"]),
+    ]
+    if duplicates is not None:
+        # Check-and-record has to see articles one at a time
+        stages.append(Stage("dedupe", dedupe, 1))
+    if keywords is not None:
+        stages.append(Stage("keywords", extract_keywords, 1))
+    if download_images:
+        stages.append(Stage("image", download_image, workers["image"]))
+    if translator is not None:
+        stages.append(Stage("translate", translate, workers["translate"]))
+    # The writer numbers records in arrival order, so the sink stays single-threaded
+    stages.append(Stage("sink", sink, 1, setup=list, teardown=flush_store))
+    
+    pipeline = Pipeline(stages, queue_size=queue_size)
+    metrics = pipeline.run(source)
+    pipeline.log_metrics()
+    
+    scraper.session_stats["pipeline"] = metrics
+    scraper.log_session_stats()
+    
+    results.sort(key=lambda work: work["index"])
+    return [work["article"] for work in results], [work["translated"] for work in results], metrics
+
+def display_enhanced_results(summary):
     """Display enhanced results with additional diagnostics"""
     print("\n" + "="*90)
     print("  EL PAÍS OPINION SECTION - ENHANCED SCRAPING RESULTS")
     print("="*90)
     
-    print(f"\n Successfully processed {len(articles)} articles from El País Opinion section")
+    print(f"\n Successfully processed {summary.articles} articles from El País Opinion section")
     print(f" Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
+    entries = summary.entries()
+    not_listed = summary.articles - len(entries)
+    
     # Enhanced article display with additional metadata
     print("\n" + "-"*70)
     print(" ARTICLES WITH ENHANCED EXTRACTION ANALYSIS:")
     print("-"*70)
     
-    for idx, article in enumerate(articles, 1):
+    for idx, entry in enumerate(entries, 1):
         print(f"\n ARTICLE {idx}:")
-        print(f"   Title: {article['title']}")
+        print(f"   Title: {entry['title']}")
         
         # Content analysis
-        content = article.get('content', '')
-        content_score = article.get('content_score', 0.0)
-        
-        if content and len(content) > 50 and content != "Content could not be extracted":
-            print(f"    Content: {content[:200]}{'...' if len(content) > 200 else ''}")
-            print(f"    Content length: {len(content)} characters")
-            print(f"    Quality score: {content_score:.2f}/1.0")
-            if article.get('extraction_method'):
-                print(f"    Extraction method: {article['extraction_method']}")
+        if entry['content_extracted']:
+            print(f"    Content: {entry['content']}{'...' if entry['content_length'] > 200 else ''}")
+            print(f"    Content length: {entry['content_length']} characters")
+            print(f"    Quality score: {entry['content_score']:.2f}/1.0")
+            if entry['extraction_method']:
+                print(f"    Extraction method: {entry['extraction_method']}")
+            if entry['keywords']:
+                print(f"    Keywords: {', '.join(entry['keywords'])}")
         else:
             print(f"    Content: Failed to extract")
-            if article.get('error'):
-                print(f"     Error: {article['error']}")
+            if entry['error']:
+                print(f"     Error: {entry['error']}")
         
         # Paywall analysis
-        if article.get('paywall_detected'):
-            confidence = article.get('paywall_confidence', 0.0)
-            print(f"    Paywall: Detected (confidence: {confidence:.2f})")
-            if article.get('bypass_method'):
-                print(f"    Bypass: {article['bypass_method']}")
+        if entry['paywall_detected']:
+            print(f"    Paywall: Detected (confidence: {entry['paywall_confidence']:.2f})")
+            if entry['bypass_method']:
+                print(f"    Bypass: {entry['bypass_method']}")
         else:
             print(f"    Paywall: Not detected")
         
-        print(f"    URL: {article.get('url', 'N/A')}")
+        print(f"    URL: {entry['url']}")
         
         # Image analysis
-        if article.get('image'):
-            print(f"     Image:  Downloaded as {article['image']}")
+        if entry['image']:
+            print(f"     Image:  Downloaded as {entry['image']}")
         else:
             print(f"     Image:  No image available")
+    if not_listed:
+        print(f"\n ... and {not_listed} more articles (see the JSON Lines output)")
     
     # Enhanced translation display
     print("\n" + "-"*70)
     print(" TRANSLATED TITLES (SPANISH → ENGLISH):")
     print("-"*70)
     
-    for idx, (original, translated) in enumerate(zip([a['title'] for a in articles], translated_titles), 1):
+    for idx, entry in enumerate((e for e in entries if e['translated'] is not None), 1):
+        original, translated = entry['title'], entry['translated']
         print(f"\n TRANSLATION {idx}:")
         print(f"   🇪🇸 ES: {original}")
         print(f"   🇺🇸 EN: {translated}")
         
-        if original.lower() != translated.lower():
+        if entry['skip_reason']:
+            print(f"    Status: Not translated ({entry['skip_reason'].replace('_', ' ')})")
+        elif original.lower() != translated.lower():
             print(f"    Status: Successfully translated")
         else:
             print(f"     Status: Translation may have failed (identical text)")
@@ -135,6 +416,7 @@ def display_enhanced_results(articles, translated_titles, repeated_words):
     print(" WORD FREQUENCY ANALYSIS:")
     print("-"*70)
     
+    repeated_words = summary.repeated_words()
     if repeated_words:
         print(f"\n Found {len(repeated_words)} words repeated more than twice:")
         sorted_words = sorted(repeated_words.items(), key=lambda x: x[1], reverse=True)
@@ -146,52 +428,41 @@ def display_enhanced_results(articles, translated_titles, repeated_words):
     
     print("\n" + "="*90)
 
-def validate_enhanced_results(articles, translated_titles):
+def validate_enhanced_results(summary):
     """Enhanced validation with detailed analytics"""
     issues = []
     warnings = []
     insights = []
+    total = summary.articles
     
     # Content extraction analysis
-    failed_content = sum(1 for a in articles if 
-                        not a.get('content') or 
-                        len(a.get('content', '')) < 50 or 
-                        a.get('content') == "Content could not be extracted")
-    
-    successful_content = len(articles) - failed_content
-    content_quality_scores = [a.get('content_score', 0.0) for a in articles if a.get('content_score')]
-    avg_quality = sum(content_quality_scores) / max(len(content_quality_scores), 1)
+    successful_content = summary.content_extracted
+    failed_content = total - successful_content
+    avg_quality = summary.average_scored_quality
     
     if failed_content > 0:
-        issues.append(f"  {failed_content}/{len(articles)} articles failed content extraction")
+        issues.append(f"  {failed_content}/{total} articles failed content extraction")
     
     # Paywall analysis
-    paywall_detected = sum(1 for a in articles if a.get('paywall_detected', False))
-    bypasses_successful = sum(1 for a in articles if a.get('bypass_method') and a.get('bypass_method') != 'direct_access')
+    paywall_detected = summary.paywalls
+    bypasses_successful = summary.bypasses
     
     if paywall_detected > 0:
-        insights.append(f" {paywall_detected}/{len(articles)} articles had paywalls detected")
+        insights.append(f" {paywall_detected}/{total} articles had paywalls detected")
         if bypasses_successful > 0:
             insights.append(f" {bypasses_successful} paywall bypasses were successful")
     
     # Translation analysis
-    failed_translations = sum(1 for orig, trans in zip([a['title'] for a in articles], translated_titles)
-                             if orig.lower() == trans.lower())
+    failed_translations = summary.translations_identical
     
     if failed_translations > 0:
-        warnings.append(f"  {failed_translations}/{len(translated_titles)} translations may have failed")
+        warnings.append(f"  {failed_translations}/{summary.translations} translations may have failed")
     
     # Image analysis
-    failed_images = sum(1 for a in articles if not a.get('image'))
+    failed_images = total - summary.images
     
     if failed_images > 0:
-        warnings.append(f"  {failed_images}/{len(articles)} articles have no images")
-    
-    # Extraction method analysis
-    extraction_methods = {}
-    for article in articles:
-        method = article.get('extraction_method', 'unknown')
-        extraction_methods[method] = extraction_methods.get(method, 0) + 1
+        warnings.append(f"  {failed_images}/{total} articles have no images")
     
     # Display results
     if issues or warnings or insights:
@@ -210,11 +481,17 @@ def validate_enhanced_results(articles, translated_titles):
         
         # Quality insights
         print(f"\n CONTENT QUALITY METRICS:")
-        print(f"   • Successful extractions: {successful_content}/{len(articles)}")
+        print(f"   • Successful extractions: {successful_content}/{total}")
         print(f"   • Average quality score: {avg_quality:.2f}/1.0")
         print(f"   • Extraction methods used:")
-        for method, count in extraction_methods.items():
+        for method, count in summary.extraction_methods.items():
             print(f"     - {method}: {count}")
+        print(f"   • Quality score distribution:")
+        for label, count in summary.quality_distribution():
+            print(f"     - {label}: {count}")
+        print(f"   • Content length distribution:")
+        for label, count in summary.length_distribution():
+            print(f"     - {label} characters: {count}")
         
         # Recommendations
         if failed_content > 2:
@@ -235,77 +512,136 @@ def validate_enhanced_results(articles, translated_titles):
             print(f"   • Consider improving content filtering and extraction")
             print(f"   • Add structured data extraction methods")
 
-def main():
+def make_translator(args):
+    if args.no_translation_cache:
+        return TranslationService(service=args.provider, use_cache=False, workers=args.translate_workers)
+    cache = TranslationCache(os.path.join(args.cache_dir, "translations.sqlite3"))
+    return TranslationService(service=args.provider, cache=cache, workers=args.translate_workers)
+
+def pipeline_workers(args):
+    return {"fetch": args.fetch_workers, "extract": args.extract_workers,
+            "image": args.image_workers, "translate": args.translate_workers}
+
+def run_crawl(args):
     """Enhanced main execution with comprehensive analytics"""
+    translator = None
+    writer = None
+    store = None
+    search_index = None
+    duplicates = None
+    keywords = None
     try:
-        print(" Starting Enhanced El País Opinion scraper...")
+        print(f" Starting Enhanced El País scraper ({', '.join(args.sections)})...")
         print(" Features: Paywall detection, bypass capabilities, enhanced diagnostics")
-        print(" This will scrape 5 articles with advanced extraction methods.")
+        print(f" This will scrape {args.articles} articles per section using the {args.engine} engine.")
         print("-" * 70)
         
-        # Step 1: Enhanced scraping
-        logger.info("Step 1: Enhanced scraping with paywall detection...")
-        articles = fetch_articles_enhanced()
-        
-        if not articles:
-            logger.error("No articles were successfully scraped. Check diagnostics.")
-            print(" Failed to scrape any articles. Check logs and diagnostics for details.")
-            return
-        
-        logger.info(f"Successfully scraped {len(articles)} articles with enhanced methods")
+        translator = make_translator(args)
+        writer = EnhancedDataWriter(compression=OUTPUT_FORMATS[args.output_format], output_dir=args.output_dir)
+        store = ArticleStore(args.db)
+        search_index = SearchIndex(args.search_db)
+        if args.duplicates != "off":
+            try:
+                from scraper.dedupe import DuplicateIndex
+                duplicates = DuplicateIndex(args.duplicates_db, threshold=args.duplicate_threshold)
+            except ImportError:
+                logger.warning("numpy not installed; skipping duplicate detection")
+        try:
+            from scraper.keywords import KeywordExtractor
+            keywords = KeywordExtractor(args.keywords_dir, top_k=args.top_keywords)
+        except ImportError:
+            logger.warning("numpy not installed; skipping keyword extraction")
+        scraper = EnhancedScraper(args.cache_dir, args.command_budget, args.budget_action)
+        summary = RunSummary()
         
-        # Step 2: Translation
-        logger.info("Step 2: Translating article titles...")
-        translator = TranslationService(service="mymemory")
+        # Step 1: Staged scraping - each article is fetched, translated, written
+        # out and upserted into the store while later ones are still loading
+        logger.info("Step 1: Running the scrape/translate pipeline with paywall detection...")
+        # Each section's titles start translating, packed into as few requests
+        # as possible, while the slower article pages are still loading
+        pending_translations = {}
         
-        titles_to_translate = [article['title'] for article in articles]
-        translated_titles = translator.translate_batch(titles_to_translate)
+        def prefetch_translations(titles):
+            new_titles = [title for title in titles if title not in pending_translations]
+            if new_titles:
+                pending_translations.update(translator.submit_batch(new_titles))
         
-        if not translated_titles:
-            logger.error("Translation failed for all titles")
-            translated_titles = titles_to_translate
+        source = iter_discovered_articles(scraper, args.articles, args.sections, args.engine,
+                                          on_titles=prefetch_translations)
+        _, _, pipeline_metrics = run_article_pipeline(
+            scraper, source, translator, writer, store, engine=args.engine,
+            workers=pipeline_workers(args), queue_size=args.queue_size, search_index=search_index,
+            duplicates=duplicates, duplicate_policy=args.duplicates, keywords=keywords,
+            summary=summary, keep_articles=False, pending_translations=pending_translations,
+            translate_bodies=args.bodies)
         
-        # Step 3: Analysis
-        logger.info("Step 3: Analyzing word frequency...")
-        repeated_words = analyze_headers(translated_titles)
+        if not summary.articles:
+            logger.error("No articles were successfully scraped. Check diagnostics.")
+            print(" Failed to scrape any articles. Check logs and diagnostics for details.")
+            return
         
-        # Step 4: Display enhanced results
-        display_enhanced_results(articles, translated_titles, repeated_words)
+        logger.info(f"Successfully scraped and translated {summary.articles} articles with enhanced methods")
         
-        # Step 5: Enhanced validation
-        validate_enhanced_results(articles, translated_titles)
+        # Step 2: Analysis - word frequencies were counted as titles were translated
+        logger.info("Step 2: Analyzing word frequency...")
+        repeated_words = summary.repeated_words()
         
-        # Step 6: Save enhanced data
-        logger.info("Step 6: Saving enhanced data with metadata...")
-        save_enhanced_data_to_json(articles, translated_titles)
+        # Step 3: Display enhanced results
+        display_enhanced_results(summary)
         
-        # Step 7: Enhanced statistics
-        successful_content = sum(1 for a in articles if 
-                               a.get('content') and 
-                               len(a.get('content', '')) > 50 and 
-                               a.get('content') != "Content could not be extracted")
-        successful_images = sum(1 for a in articles if a.get('image'))
-        successful_translations = sum(1 for orig, trans in zip([a['title'] for a in articles], translated_titles)
-                                    if orig.lower() != trans.lower())
-        paywall_detections = sum(1 for a in articles if a.get('paywall_detected', False))
-        successful_bypasses = sum(1 for a in articles if a.get('bypass_method') and a.get('bypass_method') != 'direct_access')
+        # Step 4: Enhanced validation
+        validate_enhanced_results(summary)
         
-        avg_quality = sum(a.get('content_score', 0.0) for a in articles) / len(articles)
+        # Step 5: Finish the streamed output files
+        articles_file, translations_file = writer.close()
+        logger.info(f"Step 5: Enhanced data streamed to {articles_file} and {translations_file}, "
+                   f"article store at {store.db_path} ({store.count()} articles)")
+        try:
+            from scraper.columnar import ColumnarArchive
+            exported = ColumnarArchive(args.columns_dir).export_from_store(store)
+            logger.info(f"Step 5: Exported {exported} new rows to the columnar archive")
+        except ImportError:
+            logger.warning("numpy not installed; skipping columnar export")
+
+        # Step 6: Enhanced statistics
+        total = summary.articles
+        successful_content = summary.content_extracted
+        successful_images = summary.images
+        successful_translations = summary.successful_translations
+        paywall_detections = summary.paywalls
+        successful_bypasses = summary.bypasses
+        avg_quality = summary.average_quality
         
         print(f"\n  ENHANCED FINAL STATISTICS:")
-        print(f"    Articles scraped: {len(articles)}")
-        print(f"    Content extracted: {successful_content}/{len(articles)}")
-        print(f"    Images downloaded: {successful_images}/{len(articles)}")
-        print(f"    Titles translated: {successful_translations}/{len(translated_titles)}")
+        print(f"    Articles scraped: {total}")
+        print(f"    Content extracted: {successful_content}/{total}")
+        print(f"    Images downloaded: {successful_images}/{total}")
+        print(f"    Titles translated: {successful_translations}/{summary.translations}")
+        print(f"    Titles not needing translation: {translator.skip_count}")
         print(f"    Paywalls detected: {paywall_detections}")
+        print(f"    Near-duplicates {'skipped' if args.duplicates == 'skip' else 'linked'}: "
+              f"{scraper.session_stats['duplicates']}")
         print(f"    Bypasses successful: {successful_bypasses}")
         print(f"    Average content quality: {avg_quality:.2f}/1.0")
         print(f"    Words repeated >2 times: {len(repeated_words)}")
         print(f"    API requests made: {translator.request_count}")
+        print(f"    Translation cache hits: {translator.cache_hits} (misses: {translator.cache_misses})")
+        for stage, stats in pipeline_metrics.items():
+            print(f"    Pipeline {stage}: {stats['items_per_second']} items/s with {stats['workers']} workers "
+                  f"(max queue depth {stats['max_queue_depth']})")
+        webdriver = scraper.session_stats['webdriver']
+        if webdriver['commands']:
+            print(f"    WebDriver commands: {webdriver['commands']} ({webdriver['commands_per_article']} per article, "
+                  f"{webdriver['wire_seconds']:.2f}s on the wire, {webdriver['budget_exceeded']} over budget)")
+            for site in webdriver['heaviest_call_sites'][:5]:
+                print(f"      {site['call_site']}: {site['commands']} commands, {site['wire_seconds']:.2f}s")
+        for span, timing in list(tracer.snapshot().items())[:10]:
+            print(f"    Time in {span}: {timing['total_seconds']:.2f}s over {timing['count']} calls "
+                  f"(p50 {timing['p50_seconds']:.3f}s, p95 {timing['p95_seconds']:.3f}s, p99 {timing['p99_seconds']:.3f}s)")
         
         # Enhanced success rate calculation
-        total_operations = len(articles) * 4  # content, image, translation, paywall handling
-        successful_operations = successful_content + successful_images + successful_translations + (len(articles) - paywall_detections + successful_bypasses)
+        total_operations = total * 4  # content, image, translation, paywall handling
+        successful_operations = successful_content + successful_images + successful_translations + (total - paywall_detections + successful_bypasses)
         success_rate = (successful_operations / total_operations) * 100
         
         print(f"\n Enhanced Success Rate: {success_rate:.1f}%")
@@ -318,9 +654,9 @@ def main():
             print("  Some issues detected. Check enhanced recommendations above.")
         
         print(f"\nCheck the 'images/' folder for downloaded images")
-        print(f"Check the 'data/' folder for enhanced JSON files and logs")
+        print(f"Check the 'data/' folder for enhanced JSON Lines files and logs")
         print(f"Check 'data/diagnostics/' folder for detailed failure analysis")
-        print(f"Check 'data/scraping_enhanced.log' for comprehensive logs")
+        print(f"Check '{args.log_file}' for comprehensive logs")
         
     except KeyboardInterrupt:
         logger.warning("Process interrupted by user")
@@ -329,6 +665,353 @@ def main():
         logger.error(f"Unexpected error in enhanced execution: {e}", exc_info=True)
         print(f"An error occurred: {e}")
         print("Check the enhanced log files for detailed error information")
+    finally:
+        if writer is not None:
+            writer.close()
+        if store is not None:
+            store.close()
+        if search_index is not None:
+            search_index.close()
+        if duplicates is not None:
+            duplicates.close()
+        if keywords is not None:
+            keywords.close()
+        if translator is not None:
+            translator.shutdown(cancel_pending=True)
+
+def run_re_extract(args):
+    """Fetch stored articles again and re-run extraction, by default only those that failed"""
+    store = ArticleStore(args.db)
+    search_index = SearchIndex(args.search_db)
+    keywords = None
+    try:
+        rows = [row for row in store.query(limit=args.limit)
+                if args.all or not row['content_extracted']]
+        if not rows:
+            print(" Nothing to re-extract.")
+            return
+        print(f" Re-extracting {len(rows)} articles using the {args.engine} engine...")
+        
+        source = [(row['title'], row['original_url'] or row['url'], index)
+                  for index, row in enumerate(rows, 1)]
+        existing_images = {index: row['image'] for index, row in enumerate(rows, 1)}
+        try:
+            from scraper.keywords import KeywordExtractor
+            keywords = KeywordExtractor(args.keywords_dir, top_k=args.top_keywords)
+        except ImportError:
+            logger.warning("numpy not installed; keywords of re-extracted articles are cleared")
+        scraper = EnhancedScraper(args.cache_dir, args.command_budget, args.budget_action)
+        summary = RunSummary()
+        run_article_pipeline(
+            scraper, source, store=store, engine=args.engine, workers=pipeline_workers(args),
+            queue_size=args.queue_size, download_images=False, existing_images=existing_images,
+            search_index=search_index, keywords=keywords, summary=summary, keep_articles=False)
+        
+        print(f" Content extracted for {summary.content_extracted}/{summary.articles} articles")
+    finally:
+        if keywords is not None:
+            keywords.close()
+        search_index.close()
+        store.close()
+
+def run_translate(args):
+    """Translate stored titles (and with --bodies, contents) that have no translation yet"""
+    store = ArticleStore(args.db)
+    translator = make_translator(args)
+    try:
+        stored = store.query(target=args.target, limit=args.limit)
+        rows = [row for row in stored if row['title'] and (args.force or row['translated_title'] is None)]
+        body_rows = [row for row in stored if args.bodies and row['content']
+                     and (args.force or row['translated_content'] is None)]
+        if not rows and not body_rows:
+            print(" Nothing to translate.")
+            return
+        
+        if rows:
+            print(f" Translating {len(rows)} titles ({args.source} → {args.target})...")
+            titles = [row['title'] for row in rows]
+            translations = translator.translate_batch(titles, args.source, args.target)
+            for row, translated in zip(rows, translations):
+                store.upsert_translation(row['url'], row['title'], translated,
+                                         translator.skip_reason(row['title']), args.source, args.target)
+        
+        if body_rows:
+            print(f" Translating {len(body_rows)} article bodies ({args.source} → {args.target})...")
+            for row in body_rows:
+                translated = translator.translate_long_text(row['content'], args.source, args.target)
+                store.upsert_content_translation(row['url'], translated, args.source, args.target)
+        
+        print(f" API requests made: {translator.request_count}, cache hits: {translator.cache_hits}, "
+              f"not needing translation: {translator.skip_count}")
+    finally:
+        translator.shutdown()
+        store.close()
+
+def run_import(args):
+    """Backfill the store from article dumps written by earlier crawls"""
+    store = ArticleStore(args.db)
+    try:
+        imported = store.import_json_archive(args.pattern)
+    finally:
+        store.close()
+    print(f" Imported {imported} articles into {args.db}")
+
+def run_analyse(args):
+    """Word and n-gram frequency over stored titles (and optionally content)"""
+    store = ArticleStore(args.db)
+    try:
+        filters = {"section": args.section, "since": args.since, "until": args.until}
+        if args.paywall is not None:
+            filters["paywall_detected"] = args.paywall == "yes"
+        engine = WordFrequencyEngine(ngram_sizes=args.ngrams, stopwords=args.stopwords,
+                                     chunk_size=args.chunk_size, processes=args.processes,
+                                     max_terms=args.max_terms)
+        fields = ("title", "content") if args.content else ("title",)
+        analyze_store(store, fields, translated=not args.original, engine=engine, target=args.target, **filters)
+    finally:
+        store.close()
+    
+    if args.top:
+        print(f"\n Top {args.top} terms over {engine.texts_seen} texts:")
+        terms = engine.top(args.top)
+    else:
+        repeated = engine.repeated(args.min_count)
+        print(f"\n Terms seen at least {args.min_count} times ({len(repeated)}):")
+        terms = sorted(repeated.items(), key=lambda item: (-item[1], item[0]))
+    for term, count in terms:
+        print(f"   {term}: {count}")
+
+def run_export(args):
+    """Append newly stored articles to the columnar archive"""
+    from scraper.columnar import ColumnarArchive
+    
+    store = ArticleStore(args.db)
+    try:
+        archive = ColumnarArchive(args.columns_dir, args.format)
+        exported = archive.export_from_store(store)
+    finally:
+        store.close()
+    
+    print(f" Exported {exported} new rows to {archive.root} ({archive.fmt})")
+    print(f" Extraction methods: {archive.value_counts('extraction_method')}")
+    print(f" Mean content score: {archive.mean('content_score'):.2f}")
+
+def run_search(args):
+    """Boolean/phrase search over the indexed articles, ranked by BM25"""
+    import time
+    
+    if args.rebuild:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.search_db + suffix):
+                os.remove(args.search_db + suffix)
+    index = SearchIndex(args.search_db)
+    try:
+        if args.rebuild:
+            store = ArticleStore(args.db)
+            try:
+                print(f" Indexed {index.build_from_store(store)} articles from {store.db_path}")
+            finally:
+                store.close()
+        if args.compact:
+            print(f" Dropped {index.compact()} replaced documents from the index")
+        if not args.query:
+            return
+        
+        query = " ".join(args.query)
+        started = time.perf_counter()
+        results = index.search(query, limit=args.limit)
+        elapsed = (time.perf_counter() - started) * 1000
+    finally:
+        index.close()
+    
+    print(f"\n {len(results)} results for {query!r} ({elapsed:.1f} ms):")
+    for rank, result in enumerate(results, 1):
+        print(f"   {rank}. [{result['score']:.2f}] {result['title']}")
+        print(f"      {result['url']}")
+
+def run_dedupe(args):
+    """Find near-duplicate articles already in the store"""
+    from scraper.dedupe import DuplicateIndex
+    
+    store = ArticleStore(args.db)
+    duplicates = DuplicateIndex(args.duplicates_db, threshold=args.duplicate_threshold)
+    try:
+        links = duplicates.build_from_store(store)
+    finally:
+        duplicates.close()
+        store.close()
+    
+    print(f"\n {len(links)} near-duplicate articles:")
+    for url, original, similarity in links:
+        print(f"   {url}")
+        print(f"      ≈ {original} ({similarity:.2f})")
+
+def run_keywords(args):
+    """Add TF-IDF keywords to stored articles that have none, in vectorized batches"""
+    from scraper.keywords import KeywordExtractor
+    from scraper.analyse import iter_chunks
+    
+    if args.rebuild:
+        for name in ("vocab.json", "df.npy"):
+            if os.path.exists(os.path.join(args.keywords_dir, name)):
+                os.remove(os.path.join(args.keywords_dir, name))
+    store = ArticleStore(args.db)
+    extractor = KeywordExtractor(args.keywords_dir, top_k=args.top_keywords)
+    updated = 0
+    try:
+        rows = (row for row in store.iter_query(oldest_first=True)
+                if args.rebuild or row['keywords'] is None)
+        for batch in iter_chunks(rows, args.batch_size):
+            for row in extractor.extract_articles(batch):
+                store.upsert_keywords(row['url'], row['keywords'])
+            updated += len(batch)
+            logger.info(f"Keywords extracted for {updated} articles")
+    finally:
+        extractor.close()
+        store.close()
+    
+    print(f" Keywords extracted for {updated} articles ({len(extractor.terms)} terms over "
+          f"{extractor.documents} documents)")
+
+def run_bench(args):
+    from scraper import bench
+    return bench.main(args.bench_args)
+
+OUTPUT_FORMATS = {"jsonl": None, "jsonl.gz": "gzip", "jsonl.zst": "zstd"}
+COMMANDS = {"crawl": run_crawl, "re-extract": run_re_extract, "translate": run_translate,
+            "import": run_import, "analyse": run_analyse, "export": run_export, "search": run_search,
+            "dedupe": run_dedupe, "keywords": run_keywords, "bench": run_bench}
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default="data/articles.sqlite3", help="article store path")
+    common.add_argument("--search-db", default="data/search.sqlite3", help="search index path")
+    common.add_argument("--duplicates-db", default="data/duplicates.sqlite3", help="near-duplicate index path")
+    common.add_argument("--duplicate-threshold", type=float, default=0.8,
+                        help="estimated Jaccard similarity of content shingles above which articles are duplicates")
+    common.add_argument("--keywords-dir", default="data/keywords",
+                        help="document frequency statistics for keyword extraction")
+    common.add_argument("--top-keywords", type=int, default=8, help="keywords kept per article")
+    common.add_argument("--cache-dir", default="data/cache",
+                        help="directory for the translation and paywall verdict caches")
+    common.add_argument("--log-file", default="data/scraping_enhanced.log")
+    common.add_argument("--profile", metavar="FILE",
+                        help="run under cProfile and write the stats to FILE")
+    
+    fetching = argparse.ArgumentParser(add_help=False)
+    fetching.add_argument("--engine", choices=ENGINES, default="selenium",
+                          help="selenium, plain http, or http with a browser fallback (hybrid)")
+    fetching.add_argument("--fetch-workers", type=int, default=PIPELINE_WORKERS["fetch"])
+    fetching.add_argument("--extract-workers", type=int, default=PIPELINE_WORKERS["extract"])
+    fetching.add_argument("--image-workers", type=int, default=PIPELINE_WORKERS["image"])
+    fetching.add_argument("--queue-size", type=int, default=PIPELINE_QUEUE_SIZE,
+                          help="items buffered between pipeline stages")
+    fetching.add_argument("--command-budget", type=int, default=WEBDRIVER_COMMAND_BUDGET,
+                          help="WebDriver commands allowed per article before --budget-action applies")
+    fetching.add_argument("--budget-action", choices=["log", "abort"], default=WEBDRIVER_BUDGET_ACTION)
+    
+    translating = argparse.ArgumentParser(add_help=False)
+    translating.add_argument("--provider", choices=TranslationService.SERVICES, default="mymemory")
+    translating.add_argument("--translate-workers", type=int, default=PIPELINE_WORKERS["translate"],
+                             help="translate stage threads and concurrent translation requests")
+    translating.add_argument("--no-translation-cache", action="store_true")
+    translating.add_argument("--bodies", action="store_true", help="translate article content as well as titles")
+    
+    parser = argparse.ArgumentParser(description="El País scraper with paywall handling and title translation",
+                                     epilog="Options go after the command; without one, crawl runs.")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    crawl = subparsers.add_parser("crawl", parents=[common, fetching, translating],
+                                  help="scrape, translate and save articles (default)")
+    crawl.add_argument("--articles", type=int, default=5, help="articles per section")
+    crawl.add_argument("--sections", type=lambda v: v.split(","), default=["opinion"],
+                       help="comma-separated section paths, e.g. opinion,internacional")
+    crawl.add_argument("--output-format", choices=list(OUTPUT_FORMATS), default="jsonl")
+    crawl.add_argument("--output-dir", default="data")
+    crawl.add_argument("--columns-dir", default="data/columns")
+    crawl.add_argument("--duplicates", choices=["link", "skip", "off"], default="link",
+                       help="what to do with near-duplicates of earlier articles")
+    
+    re_extract = subparsers.add_parser("re-extract", parents=[common, fetching],
+                                       help="fetch stored articles again and re-run extraction")
+    re_extract.set_defaults(engine="http")
+    re_extract.add_argument("--all", action="store_true", help="also re-extract articles that succeeded")
+    re_extract.add_argument("--limit", type=int)
+    
+    translate = subparsers.add_parser("translate", parents=[common, translating],
+                                      help="translate stored titles")
+    translate.add_argument("--source", default="es")
+    translate.add_argument("--target", default="en")
+    translate.add_argument("--force", action="store_true", help="retranslate titles that already have one")
+    translate.add_argument("--limit", type=int)
+    
+    import_ = subparsers.add_parser("import", parents=[common], help="load earlier JSON/JSONL dumps into the store")
+    import_.add_argument("--pattern", default="data/elpais_*articles_*.json*", help="glob of article dumps")
+    
+    analyse = subparsers.add_parser("analyse", parents=[common], help="word frequency over stored titles")
+    analyse.add_argument("--section")
+    analyse.add_argument("--paywall", choices=["yes", "no"])
+    analyse.add_argument("--since", help="ISO timestamp")
+    analyse.add_argument("--until", help="ISO timestamp")
+    analyse.add_argument("--target", default="en")
+    analyse.add_argument("--original", action="store_true", help="analyse the untranslated titles")
+    analyse.add_argument("--content", action="store_true", help="include article content, not just titles")
+    analyse.add_argument("--ngrams", type=lambda v: [int(n) for n in v.split(",")], default=[1],
+                         help="comma-separated n-gram sizes, e.g. 1,2")
+    analyse.add_argument("--stopwords", type=lambda v: v.split(","), default=None,
+                         help="drop stopwords for these languages, e.g. es,en")
+    analyse.add_argument("--top", type=int, help="show the k most frequent terms")
+    analyse.add_argument("--min-count", type=int, default=3,
+                         help="without --top, show terms seen at least this often")
+    analyse.add_argument("--processes", type=int, default=1, help="worker processes for counting")
+    analyse.add_argument("--chunk-size", type=int, default=1000, help="texts per counting chunk")
+    analyse.add_argument("--max-terms", type=int, help="cap the vocabulary to bound memory (approximate)")
+    
+    export = subparsers.add_parser("export", parents=[common], help="append new articles to the columnar archive")
+    export.add_argument("--columns-dir", default="data/columns")
+    export.add_argument("--format", choices=["auto", "npy", "parquet"], default="auto")
+    
+    search = subparsers.add_parser("search", parents=[common], help="search stored articles by keyword")
+    search.add_argument("query", nargs="*",
+                        help='terms are ANDed; use OR, NOT or -term, and "quotes" for phrases')
+    search.add_argument("--limit", type=int, default=10)
+    search.add_argument("--rebuild", action="store_true", help="rebuild the index from the article store")
+    search.add_argument("--compact", action="store_true", help="drop replaced documents from the posting lists")
+    
+    subparsers.add_parser("dedupe", parents=[common], help="find near-duplicate articles in the store")
+    
+    keywords = subparsers.add_parser("keywords", parents=[common],
+                                     help="add TF-IDF keywords to stored articles that have none")
+    keywords.add_argument("--rebuild", action="store_true",
+                          help="reset the document frequencies and recompute keywords for every article")
+    keywords.add_argument("--batch-size", type=int, default=256)
+    
+    bench = subparsers.add_parser("bench", parents=[common], help="run a benchmark from scraper.bench")
+    bench.add_argument("bench_args", nargs=argparse.REMAINDER)
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Plain `python main.py [options]` crawls, as it always has
+    if not argv or (not any(token in COMMANDS for token in argv) and argv not in (["-h"], ["--help"])):
+        argv = ["crawl"] + argv
+    args = build_parser().parse_args(argv)
+    
+    setup_logging(args.log_file)
+    command = COMMANDS[args.command]
+    if not args.profile:
+        return command(args)
+    
+    import cProfile
+    import pstats
+    
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(command, args)
+    finally:
+        profiler.dump_stats(args.profile)
+        print(f"\nProfile written to {args.profile}; top functions by cumulative time:")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
 
 if __name__ == "__main__":
     # Ensure required directories exist
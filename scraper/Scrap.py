@@ -1,47 +1,72 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from selenium.webdriver.edge.options import Options as EdgeOptions
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from selenium.webdriver.edge.service import Service as EdgeService
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
+# Selenium, webdriver_manager and requests are imported where they are first
+# used, so offline commands that only touch the store never load them
 import time
 import os
-import requests
 from urllib.parse import urljoin
 import logging
 import platform
 import subprocess
 import shutil
 import json
+import threading
 from datetime import datetime
-from .paywall import PaywallDetector
+from .paywall import PaywallDetector, PaywallVerdictCache
 from .extractor import EnhancedContentExtractor
 from .diagnostics import FailureDiagnostics
+from .htmlpage import By, StaticBrowser
+from .article import Article
+from .tracing import tracer
+from .driverstats import CommandMonitor, CommandStats, CommandBudgetExceeded
+from .config import WEBDRIVER_COMMAND_BUDGET, WEBDRIVER_BUDGET_ACTION
+
+ENGINES = ("selenium", "http", "hybrid")
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class EnhancedScraper:
     """Enhanced scraper with paywall bypass and advanced content extraction"""
     
-    def __init__(self):
-        self.paywall_detector = PaywallDetector()
+    def __init__(self, cache_dir=None, command_budget=WEBDRIVER_COMMAND_BUDGET,
+                 budget_action=WEBDRIVER_BUDGET_ACTION):
+        verdict_cache = PaywallVerdictCache(os.path.join(cache_dir, "paywall_verdicts.json")) if cache_dir else None
+        self.paywall_detector = PaywallDetector(verdict_cache)
         self.content_extractor = EnhancedContentExtractor()
         self.diagnostics = FailureDiagnostics()
         self.session_stats = {
             'total_articles': 0,
             'successful_extractions': 0,
             'paywall_bypasses': 0,
+            'paywall_cache_hits': 0,
+            'browser_fallbacks': 0,
+            'duplicates': 0,
             'extraction_methods': {},
             'failure_reasons': {}
         }
+        self._stats_lock = threading.Lock()
+        self.command_budget = command_budget
+        self.budget_action = budget_action
+        self.command_stats = CommandStats()
+    
+    def count_stat(self, key, bucket=None):
+        """Increment a session counter, or one bucket of a per-method counter"""
+        with self._stats_lock:
+            if bucket is None:
+                self.session_stats[key] += 1
+            else:
+                counts = self.session_stats[key]
+                counts[bucket] = counts.get(bucket, 0) + 1
+    
+    def monitor_driver(self, driver):
+        """Start counting the WebDriver commands of a real browser (static browsers send none)"""
+        if not hasattr(driver, 'execute'):
+            return None
+        return CommandMonitor(driver, self.command_budget, self.budget_action, self.command_stats).install()
+    
+    def log_session_stats(self):
+        """Write the session statistics at the end of a run, flushing the verdict cache with them"""
+        self.paywall_detector.verdict_cache.flush()
+        self.session_stats['webdriver'] = self.command_stats.snapshot()
+        self.diagnostics.log_session_stats(self.session_stats)
 
 def get_chrome_version():
     """Get Chrome version on Windows"""
@@ -62,6 +87,11 @@ def get_chrome_version():
 
 def setup_enhanced_driver():
     """Enhanced WebDriver setup with anti-detection features"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from webdriver_manager.chrome import ChromeDriverManager
+    
     chrome_options = Options()
     
     # Anti-detection options
@@ -112,6 +142,11 @@ def setup_enhanced_driver():
 
 def setup_driver_original():
     """Original driver setup as fallback"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from webdriver_manager.chrome import ChromeDriverManager
+    
     chrome_options = Options()
     chrome_options.add_argument('--headless=new')
     chrome_options.add_argument('--disable-gpu')
@@ -133,8 +168,66 @@ def setup_driver():
     """Main setup function"""
     return setup_enhanced_driver()
 
+def open_browser(engine="selenium"):
+    """A real WebDriver for the selenium engine, a StaticBrowser for http and hybrid"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown fetch engine: {engine}")
+    return setup_driver() if engine == "selenium" else StaticBrowser()
+
+class ArticleFetcher:
+    """Per-worker article loader for the selenium, http and hybrid engines
+    
+    The hybrid engine fetches over plain HTTP first and only starts a
+    browser, once per worker, for pages that came back without usable
+    content.
+    """
+    
+    def __init__(self, scraper, engine="selenium"):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown fetch engine: {engine}")
+        self.scraper = scraper
+        self.engine = engine
+        self.extractor = EnhancedContentExtractor()
+        self.static = StaticBrowser() if engine in ("http", "hybrid") else None
+        self.driver = None
+        self.monitor = None
+        if engine == "selenium":
+            self._start_browser()
+    
+    def _start_browser(self):
+        self.driver = setup_driver()
+        self.monitor = self.scraper.monitor_driver(self.driver)
+    
+    @staticmethod
+    def needs_browser(page):
+        content = page.get('content')
+        return bool(page.get('error')) or not content or \
+            content == "Content could not be extracted" or len(content) < 200
+    
+    def load(self, title, link, index):
+        self.scraper.count_stat('total_articles')
+        if self.static is not None:
+            page = load_article_page(self.static, title, link, index, self.scraper, self.extractor)
+            if self.engine == "http" or not self.needs_browser(page):
+                return page
+            logger.info(f"Static fetch of article {index} incomplete, retrying in the browser")
+            self.scraper.count_stat('browser_fallbacks')
+        if self.driver is None:
+            self._start_browser()
+        return load_monitored_page(self.driver, self.monitor, title, link, index, self.scraper, self.extractor)
+    
+    def close(self):
+        for browser in (self.static, self.driver):
+            if browser is not None:
+                browser.quit()
+
 def handle_cookies(driver):
     """Enhanced cookie handling"""
+    if getattr(driver, 'static', False):
+        return
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    
     cookie_selectors = [
         "#didomi-notice-agree-button",
         ".cookie-accept",
@@ -145,9 +238,10 @@ def handle_cookies(driver):
     
     for selector in cookie_selectors:
         try:
-            cookie_button = WebDriverWait(driver, 3).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-            )
+            with tracer.span("driver.wait", target="cookie_banner"):
+                cookie_button = WebDriverWait(driver, 3).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+                )
             cookie_button.click()
             logger.info(f"Accepted cookies using selector: {selector}")
             time.sleep(1)
@@ -157,80 +251,127 @@ def handle_cookies(driver):
     
     logger.info("No cookie popup found or already handled")
 
-def fetch_articles_enhanced():
-    """Enhanced article fetching with comprehensive error handling and diagnostics"""
+def fetch_articles_enhanced(on_title=None, on_article=None, keep_articles=True, limit=5):
+    """Enhanced article fetching with comprehensive error handling and diagnostics
+    
+    on_title, if given, is called with each title as soon as it is discovered,
+    before the slow full-article page loads start. on_article is called with
+    each article as soon as it has been fetched; with keep_articles=False the
+    articles are only streamed to on_article and not collected in memory.
+    """
     scraper = EnhancedScraper()
     driver = setup_driver()
+    monitor = scraper.monitor_driver(driver)
     
     try:
-        driver.get("https://elpais.com/opinion/")
-        time.sleep(3)
-        
-        handle_cookies(driver)
-        
-        # Enhanced article discovery
-        article_selectors = [
-            "article.c_t", "article", ".c_t", ".articulo",
-            "[data-dtm-region='articulo']", ".story_container",
-            ".article-item", ".news-item", ".content-item",
-            "a[href*='/opinion/']"
-        ]
-        
-        articles_found = []
-        for selector in article_selectors:
-            try:
-                article_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                if len(article_elements) >= 5:
-                    articles_found = article_elements[:5]
-                    logger.info(f"Found {len(articles_found)} articles using selector: {selector}")
-                    break
-            except Exception as e:
-                logger.debug(f"Selector {selector} failed: {e}")
-                continue
-        
-        if not articles_found:
-            # Fallback methods
-            try:
-                link_elements = driver.find_elements(By.CSS_SELECTOR, "a[href*='/opinion/']")[:5]
-                articles_found = link_elements
-                logger.info(f"Fallback: Found {len(link_elements)} article links")
-            except Exception as e:
-                logger.error(f"All article discovery methods failed: {e}")
-                scraper.diagnostics.log_failure("article_discovery", str(e), driver.current_url)
-                return []
-        
-        # Extract article information
-        articles = []
-        for i, article in enumerate(articles_found):
-            try:
-                title, link = extract_title_and_link_enhanced(article, driver)
-                if title and link:
-                    articles.append((title, link, i+1))
-                    logger.info(f"Successfully extracted article {i+1}: {title[:50]}...")
-                else:
-                    logger.warning(f"Could not extract title/link for article {i+1}")
-                    scraper.diagnostics.log_failure("title_link_extraction", 
-                                                   "No title or link found", 
-                                                   driver.current_url)
-            except Exception as e:
-                logger.error(f"Error processing article {i+1}: {e}")
-                scraper.diagnostics.log_failure("article_processing", str(e), driver.current_url)
-                continue
+        articles = discover_articles(driver, scraper, limit, on_title)
         
         # Fetch full articles with enhanced extraction
         result = []
         for title, link, index in articles:
-            article_data = fetch_full_article_enhanced(driver, title, link, index, scraper)
+            article_data = fetch_full_article_enhanced(driver, title, link, index, scraper, monitor)
             if article_data:
-                result.append(article_data)
+                if on_article:
+                    on_article(article_data)
+                if keep_articles:
+                    result.append(article_data)
         
         # Log session statistics
-        scraper.diagnostics.log_session_stats(scraper.session_stats)
+        scraper.log_session_stats()
         return result
         
     finally:
         driver.quit()
 
+def iter_discovered_articles(scraper, limit=5, sections=("opinion",), engine="selenium", on_titles=None):
+    """Discover up to limit articles per section and yield (title, link, index)
+    
+    Pipeline source: the listing browser is closed before the first item is
+    handed to the fetch workers. Indexes run on across sections. on_titles is
+    called with each section's titles as soon as the section is discovered.
+    """
+    browser = open_browser(engine)
+    fallback = None
+    articles = []
+    try:
+        for section in sections:
+            found = discover_articles(browser, scraper, limit, section=section)
+            if not found and engine == "hybrid":
+                # The section listing may only be rendered by JavaScript
+                fallback = fallback or setup_driver()
+                found = discover_articles(fallback, scraper, limit, section=section)
+            if on_titles and found:
+                on_titles([title for title, _, _ in found])
+            for title, link, _ in found:
+                articles.append((title, link, len(articles) + 1))
+    finally:
+        browser.quit()
+        if fallback is not None:
+            fallback.quit()
+    yield from articles
+
+def discover_articles(driver, scraper, limit=5, on_title=None, section="opinion"):
+    """Open a section page and return up to limit (title, link, index) tuples"""
+    with tracer.span("driver.get", page="section"):
+        driver.get(f"https://elpais.com/{section}/")
+    if not getattr(driver, 'static', False):
+        with tracer.span("page.ready_wait", page="section"):
+            time.sleep(3)
+    
+    handle_cookies(driver)
+    
+    # Enhanced article discovery
+    article_selectors = [
+        "article.c_t", "article", ".c_t", ".articulo",
+        "[data-dtm-region='articulo']", ".story_container",
+        ".article-item", ".news-item", ".content-item",
+        f"a[href*='/{section}/']"
+    ]
+    
+    articles_found = []
+    for selector in article_selectors:
+        try:
+            article_elements = driver.find_elements(By.CSS_SELECTOR, selector)
+            if len(article_elements) >= limit:
+                articles_found = article_elements[:limit]
+                logger.info(f"Found {len(articles_found)} articles using selector: {selector}")
+                break
+        except Exception as e:
+            logger.debug(f"Selector {selector} failed: {e}")
+            continue
+    
+    if not articles_found:
+        # Fallback methods
+        try:
+            link_elements = driver.find_elements(By.CSS_SELECTOR, f"a[href*='/{section}/']")[:limit]
+            articles_found = link_elements
+            logger.info(f"Fallback: Found {len(link_elements)} article links")
+        except Exception as e:
+            logger.error(f"All article discovery methods failed: {e}")
+            scraper.diagnostics.log_failure("article_discovery", str(e), driver.current_url)
+            return []
+    
+    # Extract article information
+    articles = []
+    for i, article in enumerate(articles_found):
+        try:
+            title, link = extract_title_and_link_enhanced(article, driver)
+            if title and link:
+                articles.append((title, link, i+1))
+                logger.info(f"Successfully extracted article {i+1}: {title[:50]}...")
+                if on_title:
+                    on_title(title)
+            else:
+                logger.warning(f"Could not extract title/link for article {i+1}")
+                scraper.diagnostics.log_failure("title_link_extraction", 
+                                               "No title or link found", 
+                                               driver.current_url)
+        except Exception as e:
+            logger.error(f"Error processing article {i+1}: {e}")
+            scraper.diagnostics.log_failure("article_processing", str(e), driver.current_url)
+            continue
+    return articles
+
 def extract_title_and_link_enhanced(article_element, driver):
     """Enhanced title and link extraction with multiple fallback strategies"""
     # Expanded selectors for better coverage
@@ -288,18 +429,58 @@ def extract_title_and_link_enhanced(article_element, driver):
     
     return None, None
 
-def fetch_full_article_enhanced(driver, title, link, index, scraper):
+def fetch_full_article_enhanced(driver, title, link, index, scraper, monitor=None):
     """Enhanced article fetching with paywall detection and bypass"""
-    scraper.session_stats['total_articles'] += 1
+    scraper.count_stat('total_articles')
+    page = load_monitored_page(driver, monitor, title, link, index, scraper)
+    if not page.get('error'):
+        page['image'] = download_first_image(page['image_candidates'], index)
+    return finalize_article(page, scraper)
+
+def load_monitored_page(driver, monitor, title, link, index, scraper, extractor=None):
+    """load_article_page with the article's WebDriver commands counted by monitor
+    
+    An article aborted for going over the command budget comes back as an
+    error page, even when the extraction code swallowed the exception.
+    """
+    if monitor is None:
+        return load_article_page(driver, title, link, index, scraper, extractor)
+    monitor.begin_article(link)
+    try:
+        page = load_article_page(driver, title, link, index, scraper, extractor)
+    finally:
+        commands = monitor.end_article()
+    if commands['budget_exceeded'] and monitor.on_budget == "abort":
+        scraper.count_stat('failure_reasons', "command_budget_exceeded")
+        if not page.get('error'):
+            page = {"title": title, "url": link, "index": index,
+                    "error": f"WebDriver command budget of {monitor.budget} exceeded"}
+    return page
+
+def load_article_page(driver, title, link, index, scraper, extractor=None):
+    """Load an article and do everything that needs the live page
+    
+    Covers paywall detection, bypass, DOM content extraction and collecting
+    image candidates. The result feeds download_first_image and
+    finalize_article, which no longer need the driver. Pipeline fetch
+    workers pass their own extractor, since it records the winning method.
+    """
+    extractor = extractor or scraper.content_extractor
     
     try:
         logger.info(f"Fetching article {index}: {link}")
-        driver.get(link)
-        time.sleep(4)
+        with tracer.span("driver.get", page="article"):
+            driver.get(link)
+        if not getattr(driver, 'static', False):
+            with tracer.span("page.ready_wait", page="article"):
+                time.sleep(4)
         
         # Step 1: Detect paywall
-        paywall_results = scraper.paywall_detector.detect_paywall(driver, link)
+        with tracer.span("paywall.detect"):
+            paywall_results = scraper.paywall_detector.detect_paywall(driver, link)
         scraper.diagnostics.log_paywall_detection(link, paywall_results)
+        if paywall_results.get('cached'):
+            scraper.count_stat('paywall_cache_hits')
         
         # Step 2: Attempt bypass if needed
         bypass_results = {'success': True, 'method_used': 'direct_access', 'content': None}
@@ -307,7 +488,7 @@ def fetch_full_article_enhanced(driver, title, link, index, scraper):
             logger.info(f"Paywall detected (confidence: {paywall_results['confidence']:.2f}), attempting bypass...")
             bypass_results = scraper.paywall_detector.bypass_paywall(driver, link, paywall_results)
             if bypass_results['success']:
-                scraper.session_stats['paywall_bypasses'] += 1
+                scraper.count_stat('paywall_bypasses')
                 logger.info(f"Paywall bypassed using: {bypass_results['method_used']}")
         
         # Step 3: Extract content using enhanced methods
@@ -315,56 +496,73 @@ def fetch_full_article_enhanced(driver, title, link, index, scraper):
             content = bypass_results['content']
             extraction_method = f"bypass_{bypass_results['method_used']}"
         else:
-            content = scraper.content_extractor.extract_content_comprehensive(driver, link)
-            extraction_method = scraper.content_extractor.last_successful_method
-        
-        # Step 4: Extract image
-        image_path = download_article_image_enhanced(driver, index)
+            content = extractor.extract_content_comprehensive(driver, link)
+            extraction_method = extractor.last_successful_method
         
-        # Step 5: Validate and score content
-        content_score = scraper.content_extractor.score_content_quality(content)
-        
-        if content and content != "Content could not be extracted":
-            scraper.session_stats['successful_extractions'] += 1
-            method_key = extraction_method or 'unknown'
-            scraper.session_stats['extraction_methods'][method_key] = \
-                scraper.session_stats['extraction_methods'].get(method_key, 0) + 1
-        else:
-            # Log detailed failure information
+        if not content or content == "Content could not be extracted":
+            # Log detailed failure information while the page is still loaded
             scraper.diagnostics.log_detailed_failure(driver, link, title, index)
-            reason = "content_extraction_failed"
-            scraper.session_stats['failure_reasons'][reason] = \
-                scraper.session_stats['failure_reasons'].get(reason, 0) + 1
         
-        article_data = {
+        return {
             "title": title,
-            "content": content,
-            "image": image_path,
             "url": link,
-            "paywall_detected": paywall_results['has_paywall'],
-            "paywall_confidence": paywall_results['confidence'],
-            "bypass_method": bypass_results.get('method_used'),
+            "index": index,
+            "content": content,
+            "paywall_results": paywall_results,
+            "bypass_results": bypass_results,
             "extraction_method": extraction_method,
-            "content_score": content_score,
-            "extraction_timestamp": datetime.now().isoformat()
+            "image_candidates": find_image_candidates(driver),
+            "image": None
         }
         
-        return article_data
-        
     except Exception as e:
         logger.error(f"Failed to fetch article {index} from {link}: {e}")
-        scraper.diagnostics.log_detailed_failure(driver, link, title, index, str(e))
-        return {
-            "title": title,
-            "content": "Content could not be extracted",
-            "image": None,
-            "url": link,
-            "error": str(e),
-            "extraction_timestamp": datetime.now().isoformat()
-        }
+        if not isinstance(e, CommandBudgetExceeded):
+            scraper.diagnostics.log_detailed_failure(driver, link, title, index, str(e))
+        return {"title": title, "url": link, "index": index, "error": str(e)}
+
+def finalize_article(page, scraper, extractor=None):
+    """Score the extracted content, update session stats and build the Article record"""
+    extractor = extractor or scraper.content_extractor
+    if page.get('error'):
+        return Article(
+            title=page['title'],
+            content="Content could not be extracted",
+            image=None,
+            url=page['url'],
+            error=page['error'],
+            extraction_timestamp=datetime.now().isoformat()
+        )
+    
+    content = page['content']
+    extraction_method = page['extraction_method']
+    content_score = extractor.score_content_quality(content)
+    
+    if content and content != "Content could not be extracted":
+        scraper.count_stat('successful_extractions')
+        scraper.count_stat('extraction_methods', extraction_method or 'unknown')
+    else:
+        scraper.count_stat('failure_reasons', "content_extraction_failed")
+    
+    return Article(
+        title=page['title'],
+        content=content,
+        image=page.get('image'),
+        url=page['url'],
+        paywall_detected=page['paywall_results']['has_paywall'],
+        paywall_confidence=page['paywall_results']['confidence'],
+        bypass_method=page['bypass_results'].get('method_used'),
+        extraction_method=extraction_method,
+        content_score=content_score,
+        extraction_timestamp=datetime.now().isoformat()
+    )
 
 def download_article_image_enhanced(driver, article_index):
     """Enhanced image download with better selection and fallback"""
+    return download_first_image(find_image_candidates(driver), article_index)
+
+def find_image_candidates(driver):
+    """Valid image URLs on the loaded page, best selectors first"""
     # Expanded image selectors
     image_selectors = [
         "figure.a_m img", ".a_m img", "figure img",
@@ -376,6 +574,7 @@ def download_article_image_enhanced(driver, article_index):
         "img[alt*='articulo']", "img[alt*='noticia']"
     ]
     
+    candidates = []
     for selector in image_selectors:
         try:
             images = driver.find_elements(By.CSS_SELECTOR, selector)
@@ -384,13 +583,20 @@ def download_article_image_enhanced(driver, article_index):
                       img.get_attribute("data-src") or 
                       img.get_attribute("data-lazy-src"))
                 
-                if src and is_valid_image_url_enhanced(src):
-                    downloaded_path = download_image_enhanced(src, article_index)
-                    if downloaded_path:
-                        return downloaded_path
+                if src and is_valid_image_url_enhanced(src) and src not in candidates:
+                    candidates.append(src)
         except Exception as e:
             logger.debug(f"Image selector {selector} failed: {e}")
             continue
+    return candidates
+
+def download_first_image(candidates, article_index):
+    """Download the first candidate that yields a usable image"""
+    for src in candidates:
+        with tracer.span("image.download"):
+            downloaded_path = download_image_enhanced(src, article_index)
+        if downloaded_path:
+            return downloaded_path
     
     logger.warning(f"No suitable image found for article {article_index}")
     return None
@@ -425,6 +631,8 @@ def is_valid_image_url_enhanced(url):
 
 def download_image_enhanced(image_url, article_index):
     """Enhanced image download with better error handling"""
+    import requests
+    
     try:
         if not image_url.startswith('http'):
             image_url = urljoin("https://elpais.com", image_url)
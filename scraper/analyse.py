@@ -1,8 +1,131 @@
-from collections import Counter
+from collections import Counter, deque
+from itertools import islice
+from operator import itemgetter
+import heapq
 import re
 
-def analyze_headers(headers):
-    all_words = re.findall(r'\b\w+\b', " ".join(headers).lower())
-    word_count = Counter(all_words)
-    repeated_words = {word: count for word, count in word_count.items() if count > 2}
-    return repeated_words
\ No newline at end of file
+TOKEN_PATTERN = re.compile(r'\b\w+\b')
+
+STOPWORDS = {
+    "es": frozenset("""
+        a al algo algunas algunos ante antes como con contra cual cuando de del desde donde durante e el
+        ella ellas ellos en entre era eran es esa esas ese eso esos esta estaba estado estas este esto
+        estos fue fueron ha habia han hasta hay la las le les lo los mas me mi mientras mucho muy nada ni
+        no nos nosotros o os otra otras otro otros para pero poco por porque que quien se sea segun ser
+        si sido sin sino sobre son su sus también tambien te tiene tienen todo todos tu un una unas uno
+        unos y ya yo más qué cómo él está están había según
+    """.split()),
+    "en": frozenset("""
+        a about after all also an and any are as at be because been before being between both but by can
+        could did do does during each for from had has have he her here him his how i if in into is it
+        its just me more most my no not now of on one only or other our out over own said same she should
+        so some such than that the their them then there these they this those through to too under up
+        very was we were what when where which while who why will with would you your
+    """.split()),
+}
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+def stopwords_for(languages):
+    """Union of the stopword lists for the given language codes"""
+    return frozenset().union(*(STOPWORDS[language] for language in languages)) if languages else frozenset()
+
+def count_chunk(texts, ngram_sizes=(1,), stopwords=frozenset()):
+    """Counter of the n-grams in a chunk of texts (module-level so worker processes can run it)
+
+    Unigrams that are stopwords are dropped, as are longer n-grams that
+    start or end with one; "derechos de autor" survives, "de la" does not.
+    """
+    counts = Counter()
+    for text in texts:
+        tokens = tokenize(text)
+        for n in ngram_sizes:
+            if n == 1:
+                counts.update(token for token in tokens if token not in stopwords)
+            else:
+                counts.update(" ".join(gram) for gram in zip(*(tokens[i:] for i in range(n)))
+                              if gram[0] not in stopwords and gram[-1] not in stopwords)
+    return counts
+
+def iter_chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class WordFrequencyEngine:
+    """Streaming word and n-gram counter
+
+    Texts are consumed from any iterator in chunks, so the input never has
+    to fit in memory. With processes > 1 the chunks are counted in a worker
+    pool and the partial Counters are merged as they come back; at most two
+    chunks per process are in flight at once. max_terms caps the
+    vocabulary: when the table grows past twice that, it is pruned to the
+    max_terms most frequent entries, which keeps memory bounded at the cost
+    of undercounting rare terms.
+
+        engine = WordFrequencyEngine(ngram_sizes=(1, 2), stopwords=("es", "en"))
+        engine.consume(store.iter_titles()).top(20)
+    """
+
+    def __init__(self, ngram_sizes=(1,), stopwords=None, chunk_size=1000, processes=1, max_terms=None):
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.stopwords = stopwords_for(stopwords)
+        self.chunk_size = chunk_size
+        self.processes = processes
+        self.max_terms = max_terms
+        self.counts = Counter()
+        self.texts_seen = 0
+        self.pruned = False
+
+    def _merge(self, partial):
+        self.counts.update(partial)
+        if self.max_terms and len(self.counts) > 2 * self.max_terms:
+            self.counts = Counter(dict(self.counts.most_common(self.max_terms)))
+            self.pruned = True
+
+    def consume(self, texts):
+        """Count every text from the iterator; returns self so calls can be chained"""
+        chunks = iter_chunks(texts, self.chunk_size)
+        if self.processes <= 1:
+            for chunk in chunks:
+                self.texts_seen += len(chunk)
+                self._merge(count_chunk(chunk, self.ngram_sizes, self.stopwords))
+            return self
+
+        from multiprocessing import Pool
+
+        with Pool(self.processes) as pool:
+            in_flight = deque()
+            for chunk in chunks:
+                self.texts_seen += len(chunk)
+                in_flight.append(pool.apply_async(count_chunk, (chunk, self.ngram_sizes, self.stopwords)))
+                if len(in_flight) >= 2 * self.processes:
+                    self._merge(in_flight.popleft().get())
+            while in_flight:
+                self._merge(in_flight.popleft().get())
+        return self
+
+    def top(self, k=10):
+        """The k most frequent terms as (term, count), using a bounded heap"""
+        return heapq.nlargest(k, self.counts.items(), key=itemgetter(1))
+
+    def repeated(self, min_count=3):
+        """Terms seen at least min_count times, in first-seen order"""
+        return {term: count for term, count in self.counts.items() if count >= min_count}
+
+def analyze_headers(headers, min_count=3):
+    """Words appearing at least min_count times (by default more than twice) across the headers"""
+    return WordFrequencyEngine().consume(headers).repeated(min_count)
+
+def analyze_store_headers(store, translated=True, min_count=3, **filters):
+    """Word frequency over titles in an ArticleStore, e.g. analyze_store_headers(store, section="opinion")"""
+    return analyze_headers(store.iter_titles(translated=translated, **filters), min_count)
+
+def analyze_store(store, fields=("title",), translated=True, engine=None, **filters):
+    """Stream titles and/or content from an ArticleStore through a WordFrequencyEngine"""
+    engine = engine or WordFrequencyEngine()
+    return engine.consume(store.iter_texts(fields, translated=translated, **filters))
@@ -0,0 +1,107 @@
+import json
+import sys
+from collections.abc import MutableMapping
+
+_MISSING = object()
+
+class Article(MutableMapping):
+    """Slotted article record that still reads like the old article dict
+
+    Known fields live in __slots__ instead of a per-object dict, and a
+    field that was never set is simply absent, so iterating an Article
+    yields the same keys, in the same order, as the dicts the scraper used
+    to build. Values of the enumerated fields (extraction and bypass
+    method) are interned and shared between records. FIELDS includes the
+    keys the pipeline stages add after extraction; any other key goes into
+    a small overflow dict that is only created when needed. Nothing is converted to a dict
+    until a caller asks for one (to_dict, {**article}, json).
+    """
+
+    FIELDS = ('title', 'content', 'image', 'url', 'error', 'paywall_detected', 'paywall_confidence',
+              'bypass_method', 'extraction_method', 'content_score', 'extraction_timestamp',
+              # Set by the dedupe, keywords and translate pipeline stages, in that order
+              'duplicate_of', 'duplicate_similarity', 'keywords', 'translated_content')
+    INTERNED = frozenset({'bypass_method', 'extraction_method'})
+
+    __slots__ = tuple(f"_{name}" for name in FIELDS) + ('_extra',)
+
+    def __init__(self, **fields):
+        for name in self.FIELDS:
+            setattr(self, f"_{name}", _MISSING)
+        self._extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        return data if isinstance(data, cls) else cls(**data)
+
+    @classmethod
+    def from_json(cls, line):
+        return cls(**json.loads(line))
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            value = getattr(self, f"_{key}")
+            if value is not _MISSING:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            if key in self.INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, f"_{key}", value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.FIELDS and getattr(self, f"_{key}") is not _MISSING:
+            setattr(self, f"_{key}", _MISSING)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for name in self.FIELDS:
+            if getattr(self, f"_{name}") is not _MISSING:
+                yield name
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return f"Article({self.to_dict()!r})"
+
+def read_articles(path):
+    """Articles from a (possibly compressed) JSON Lines file written by the crawl"""
+    from .sink import read_jsonl
+
+    for record in read_jsonl(path):
+        yield Article(**record)
@@ -0,0 +1,205 @@
+# scraper/bench.py - throughput and import-time benchmarks
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import statistics
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+HEADLINE_WORDS = [
+    "el", "gobierno", "de", "españa", "y", "la", "unión europea", "sin embargo", "no",
+    "tiene", "un", "proyecto", "para", "el", "futuro", "democracia", "crisis", "verano",
+    "miseria", "en", "cuba", "lenguas", "podridas", "justicia", "libertad", "memoria",
+    "guerra", "paz", "sociedad", "presidente", "elecciones", "derechos humanos"
+]
+
+def make_headlines(count, seed=42):
+    """Deterministic synthetic Spanish headlines"""
+    rng = random.Random(seed)
+    headlines = []
+    for i in range(count):
+        words = [rng.choice(HEADLINE_WORDS) for _ in range(rng.randint(4, 10))]
+        headline = " ".join(words)
+        headlines.append(f"{headline[0].upper()}{headline[1:]} {i}")
+    return headlines
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+def run_translate_case(texts, endpoints, concurrency, cache_dir, pack):
+    """Translate texts once and return throughput and per-text completion latency
+
+    Every text is submitted at the start of the batch, so a text's latency is
+    the time until its translation is available to the caller.
+    """
+    from .translate import TranslationService, TranslationCache
+
+    cache = TranslationCache(os.path.join(cache_dir, "translations.sqlite3")) if cache_dir else None
+    limits = {name: {"rate": 1000.0, "burst": concurrency, "concurrency": concurrency}
+              for name in ("mymemory", "googletrans", "libre_fixed")}
+    service = TranslationService(service="mymemory", cache=cache, use_cache=cache is not None,
+                                 endpoints=endpoints, provider_limits=limits,
+                                 providers=["mymemory", "libre_fixed"])
+    service.skip_language_check = True
+
+    latencies = []
+    started = time.perf_counter()
+    service.translate_batch(texts, max_workers=concurrency, pack=pack,
+                            progress_callback=lambda *_: latencies.append(time.perf_counter() - started))
+    elapsed = time.perf_counter() - started
+    if cache:
+        cache.close()
+
+    return {
+        "texts": len(texts),
+        "seconds": round(elapsed, 4),
+        "texts_per_second": round(len(texts) / elapsed, 2) if elapsed else None,
+        "p50_latency": round(percentile(latencies, 0.50), 4),
+        "p99_latency": round(percentile(latencies, 0.99), 4),
+        "api_requests": service.request_count,
+        "cache_hits": service.cache_hits,
+        "provider_health": service.router.snapshot()
+    }
+
+PACKING_ASSUMPTION = ("the mock MyMemory endpoint translates each newline-separated line separately, so "
+                      "every packed request lines up with its segments; request counts with pack=True are "
+                      "a lower bound, not a measurement of the real API")
+
+def bench_translate(args):
+    from .mock_server import MockTranslationServer
+
+    texts = make_headlines(args.texts)
+    results = []
+    with MockTranslationServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                               rate_limit_rate=args.rate_limit_rate, seed=args.seed) as server:
+        for concurrency in args.concurrency:
+            for cache_mode in args.cache:
+                for pack in args.pack:
+                    cache_dir = tempfile.mkdtemp(prefix="translate_bench_") if cache_mode == "on" else None
+                    try:
+                        runs = ["cold", "warm"] if cache_dir else ["cold"]
+                        for run in runs:
+                            result = run_translate_case(texts, server.endpoints, concurrency, cache_dir, pack)
+                            result.update({"concurrency": concurrency, "cache": cache_mode,
+                                           "pack": pack, "run": run})
+                            results.append(result)
+                            print(f"  concurrency={concurrency:<3} cache={cache_mode:<3} pack={str(pack):<5} "
+                                  f"{run:<4}  {result['texts_per_second']:>9} texts/s  "
+                                  f"p50={result['p50_latency']:.3f}s  p99={result['p99_latency']:.3f}s  "
+                                  f"requests={result['api_requests']}")
+                    finally:
+                        if cache_dir:
+                            shutil.rmtree(cache_dir, ignore_errors=True)
+        mock_requests = dict(server.request_counts)
+
+    if any(args.pack):
+        print(f"  Note: {PACKING_ASSUMPTION}")
+    return {"benchmark": "translate", "mock_server": mock_requests, "assumptions": [PACKING_ASSUMPTION],
+            "results": results}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TARGETS = ["main", "scraper.Scrap", "scraper.translate", "scraper.store",
+                  "scraper.analyse", "scraper.columnar", "scraper.pipeline"]
+HEAVY_PACKAGES = ("selenium", "webdriver_manager", "requests", "googletrans", "numpy", "bs4")
+
+IMPORT_PROBE = """
+import sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(elapsed, ",".join(heavy))
+"""
+
+def measure_import(module, repeats):
+    """Import time of a module in fresh interpreters, plus the heavy packages it pulled in"""
+    timings = []
+    heavy = []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(module=module, heavy=HEAVY_PACKAGES)],
+                                capture_output=True, text=True, cwd=REPO_ROOT)
+        if result.returncode != 0:
+            return {"module": module, "error": result.stderr.strip().splitlines()[-1]}
+        elapsed, _, loaded = result.stdout.strip().partition(" ")
+        timings.append(float(elapsed))
+        heavy = [name for name in loaded.split(",") if name]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "min_ms": round(min(timings) * 1000, 2),
+        "heavy_packages": heavy
+    }
+
+def bench_imports(args):
+    results = []
+    for module in args.modules:
+        result = measure_import(module, args.repeats)
+        results.append(result)
+        if "error" in result:
+            print(f"  {module:<20} failed: {result['error']}")
+        else:
+            print(f"  {module:<20} {result['median_ms']:>8.2f} ms median  {result['min_ms']:>8.2f} ms min  "
+                  f"heavy: {', '.join(result['heavy_packages']) or 'none'}")
+    return {"benchmark": "imports", "python": sys.version.split()[0], "results": results}
+
+def save_results(report, output_dir="data/benchmarks"):
+    """Write the report as JSON; data/benchmarks/ is gitignored"""
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = os.path.join(output_dir, f"{report['benchmark']}_bench_{timestamp}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(report, timestamp=datetime.now().isoformat()), f, ensure_ascii=False, indent=2)
+    print(f"Results saved to: {path}")
+    return path
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scraper performance benchmarks")
+    parser.add_argument("--verbose", action="store_true", help="show scraper log output")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    translate = subparsers.add_parser("translate", help="TranslationService throughput against a local mock API")
+    translate.add_argument("--texts", type=int, default=200, help="number of synthetic headlines")
+    translate.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 4, 16],
+                           help="comma-separated worker counts")
+    translate.add_argument("--cache", type=lambda v: v.split(","), default=["off", "on"],
+                           help="comma-separated cache modes (off,on)")
+    translate.add_argument("--pack", type=lambda v: [x == "on" for x in v.split(",")], default=[False, True],
+                           help="comma-separated packing modes (off,on)")
+    translate.add_argument("--latency", type=float, default=0.05)
+    translate.add_argument("--jitter", type=float, default=0.02)
+    translate.add_argument("--error-rate", type=float, default=0.0)
+    translate.add_argument("--rate-limit-rate", type=float, default=0.0)
+    translate.add_argument("--seed", type=int, default=42)
+    translate.set_defaults(func=bench_translate)
+
+    imports = subparsers.add_parser("imports", help="cold import time of the scraper modules")
+    imports.add_argument("--modules", type=lambda v: v.split(","), default=IMPORT_TARGETS,
+                         help="comma-separated modules to import")
+    imports.add_argument("--repeats", type=int, default=5, help="fresh interpreters per module")
+    imports.set_defaults(func=bench_imports)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Injected faults make the translation logs noisy; hide them unless asked. force
+    # replaces the handlers main.py sets up before dispatching `main.py bench`
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL, force=True)
+    print(f"Running {args.benchmark} benchmark...")
+    report = args.func(args)
+    save_results(report)
+    return report
+
+if __name__ == "__main__":
+    main()
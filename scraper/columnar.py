@@ -0,0 +1,221 @@
+import json
+import logging
+import hashlib
+import os
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class ColumnarArchive:
+    """Column-per-file export of article metadata for analytics
+
+    Every export run becomes a partition under root/. In the default npy
+    format each column of a partition is its own .npy file, so an aggregate
+    memory-maps only the columns it reads. With pyarrow installed a
+    partition can be written as one Parquet file instead. Categorical
+    columns are stored as int16 codes into a shared vocabulary, and
+    timestamps are stored as int64 epoch microseconds. The manifest records
+    partitions and the store watermark, so exports are incremental.
+
+    The store upserts by URL, so an article that is re-crawled, re-extracted
+    or retranslated is exported again in a later partition. Reads keep only
+    the newest row per url_hash, the first 8 bytes of the URL's BLAKE2b
+    digest; column(name, history=True) returns every exported row.
+    """
+
+    NUMERIC_COLUMNS = {
+        'content_score': np.float32,
+        'paywall_confidence': np.float32,
+        'content_length': np.int32,
+        'title_length': np.int32,
+        'paywall_detected': np.bool_,
+        'image_downloaded': np.bool_,
+        'content_extracted': np.bool_,
+        'extraction_timestamp': np.int64,
+        'url_hash': np.uint64,
+    }
+    CATEGORICAL_COLUMNS = ['extraction_method', 'bypass_method', 'section']
+    URL_HASH = "blake2b-64"
+
+    def __init__(self, root="data/columns", fmt="auto"):
+        self.root = root
+        if fmt == "auto":
+            try:
+                import pyarrow  # noqa: F401
+                fmt = "parquet"
+            except ImportError:
+                fmt = "npy"
+        self.fmt = fmt
+        os.makedirs(root, exist_ok=True)
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.manifest = {"partitions": [], "vocab": {c: [] for c in self.CATEGORICAL_COLUMNS}, "watermark": None}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        self._codes = {column: {value: code for code, value in enumerate(values)}
+                       for column, values in self.manifest["vocab"].items()}
+        legacy = [p["name"] for p in self.manifest["partitions"] if p.get("url_hash") != self.URL_HASH]
+        if legacy:
+            logger.warning(f"{len(legacy)} partitions in {root} use 32-bit CRC url hashes and are not deduplicated "
+                           f"against newer rows; delete the archive and export again to fix")
+        self._current = None
+
+    @property
+    def columns(self):
+        return list(self.NUMERIC_COLUMNS) + self.CATEGORICAL_COLUMNS
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _code(self, column, value):
+        """Stable int16 code for a categorical value; -1 is missing"""
+        if value is None:
+            return -1
+        codes = self._codes[column]
+        if value not in codes:
+            codes[value] = len(codes)
+            self.manifest["vocab"][column].append(value)
+        return codes[value]
+
+    @staticmethod
+    def url_hash(url):
+        """64-bit url hash, so collisions between articles are practically impossible"""
+        return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little')
+
+    @staticmethod
+    def _timestamp_us(value):
+        if not value:
+            return 0
+        try:
+            return int(datetime.fromisoformat(value).timestamp() * 1_000_000)
+        except (TypeError, ValueError):
+            return 0
+
+    def _to_columns(self, records):
+        values = {column: [] for column in self.columns}
+        for record in records:
+            url = record.get('url') or ''
+            values['content_score'].append(record.get('content_score', record.get('content_quality_score')) or 0.0)
+            values['paywall_confidence'].append(record.get('paywall_confidence') or 0.0)
+            values['content_length'].append(len(record.get('content') or ''))
+            values['title_length'].append(len(record.get('title') or ''))
+            values['paywall_detected'].append(bool(record.get('paywall_detected')))
+            values['image_downloaded'].append(bool(record.get('image_downloaded', record.get('image'))))
+            values['content_extracted'].append(bool(record.get('content_extracted')))
+            values['extraction_timestamp'].append(self._timestamp_us(record.get('extraction_timestamp')))
+            values['url_hash'].append(self.url_hash(url))
+            for column in self.CATEGORICAL_COLUMNS:
+                values[column].append(self._code(column, record.get(column)))
+
+        arrays = {column: np.asarray(values[column], dtype=dtype)
+                  for column, dtype in self.NUMERIC_COLUMNS.items()}
+        for column in self.CATEGORICAL_COLUMNS:
+            arrays[column] = np.asarray(values[column], dtype=np.int16)
+        return arrays
+
+    def append(self, records, watermark=None):
+        """Write records as a new partition; returns the number of rows written"""
+        return self._write_partition(self._to_columns(records), watermark)
+
+    def _write_partition(self, arrays, watermark):
+        rows = len(arrays['url_hash'])
+        if rows == 0:
+            return 0
+
+        name = f"part_{len(self.manifest['partitions']):06d}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.table(arrays), os.path.join(self.root, f"{name}.parquet"))
+        else:
+            partition_dir = os.path.join(self.root, name)
+            os.makedirs(partition_dir, exist_ok=True)
+            for column, array in arrays.items():
+                np.save(os.path.join(partition_dir, f"{column}.npy"), array)
+
+        self.manifest["partitions"].append({"name": name, "format": self.fmt, "rows": rows,
+                                            "url_hash": self.URL_HASH})
+        if watermark is not None:
+            self.manifest["watermark"] = watermark
+        self._save_manifest()
+        self._current = None
+        logger.info(f"Exported {rows} rows to columnar partition {name}")
+        return rows
+
+    def export_from_store(self, store):
+        """Append articles upserted into the store since the last export
+
+        Rows are streamed from the store, so only the column values of the
+        changed articles are held in memory, not their content.
+        """
+        watermark = self.manifest.get("watermark")
+        newest = [watermark]
+
+        def changed_rows():
+            for row in store.iter_query(updated_after=watermark):
+                if newest[0] is None or row['updated_at'] > newest[0]:
+                    newest[0] = row['updated_at']
+                yield row
+
+        arrays = self._to_columns(changed_rows())
+        return self._write_partition(arrays, newest[0])
+
+    def _read(self, name):
+        parts = []
+        for partition in self.manifest["partitions"]:
+            if partition["format"] == "parquet":
+                import pyarrow.parquet as pq
+                table = pq.read_table(os.path.join(self.root, f"{partition['name']}.parquet"), columns=[name])
+                parts.append(table.column(name).to_numpy())
+            else:
+                parts.append(np.load(os.path.join(self.root, partition["name"], f"{name}.npy"), mmap_mode="r"))
+        if not parts:
+            dtype = self.NUMERIC_COLUMNS.get(name, np.int16)
+            return np.empty(0, dtype=dtype)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def current_rows(self):
+        """Boolean mask over all exported rows, True for the newest row of each url_hash"""
+        if self._current is None:
+            hashes = self._read('url_hash')
+            # np.unique returns first occurrences; over the reversed column those are the newest rows
+            _, reversed_index = np.unique(hashes[::-1], return_index=True)
+            current = np.zeros(len(hashes), dtype=np.bool_)
+            current[len(hashes) - 1 - reversed_index] = True
+            self._current = current
+        return self._current
+
+    def column(self, name, history=False):
+        """One column across all partitions, newest row per article unless history is set
+
+        npy partitions are memory-mapped; with only one row per article
+        everywhere the mapped column is returned as is.
+        """
+        values = self._read(name)
+        if history:
+            return values
+        current = self.current_rows()
+        return values if current.all() else values[current]
+
+    def value_counts(self, name):
+        """Counts per value of a categorical column, decoded to labels"""
+        codes = self.column(name)
+        counts = np.bincount(codes[codes >= 0].astype(np.int64), minlength=len(self.manifest["vocab"][name]))
+        result = {value: int(count) for value, count in zip(self.manifest["vocab"][name], counts) if count}
+        missing = int((codes < 0).sum())
+        if missing:
+            result[None] = missing
+        return result
+
+    def histogram(self, name, bins=10, value_range=(0.0, 1.0)):
+        """Histogram of a numeric column, e.g. the content quality score distribution"""
+        counts, edges = np.histogram(self.column(name), bins=bins, range=value_range)
+        return counts.tolist(), edges.tolist()
+
+    def mean(self, name):
+        values = self.column(name)
+        return float(values.mean()) if len(values) else 0.0
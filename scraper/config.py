@@ -1,4 +1,43 @@
+import os
+
 TRANSLATION_API_URL = "https://libretranslate.de/translate" # LibreTranslate API URL
+MYMEMORY_API_URL = "https://api.mymemory.translated.net/get" # MyMemory API URL
 TRANSLATION_API_HEADERS = {
     "Content-Type": "application/json" 
-}
\ No newline at end of file
+}
+
+# Per-provider translation limits: sustained requests per second, burst size
+# and maximum in-flight requests
+TRANSLATION_PROVIDER_LIMITS = {
+    "mymemory": {"rate": 2.0, "burst": 4, "concurrency": 4},
+    "googletrans": {"rate": 1.0, "burst": 2, "concurrency": 2},
+    "libre_fixed": {"rate": 0.5, "burst": 1, "concurrency": 1},
+}
+
+# Maximum characters per packed multi-segment request
+TRANSLATION_PACK_LIMITS = {
+    "mymemory": 500,
+    "googletrans": 4500,
+    "libre_fixed": 5000,
+}
+
+# Phrase tables for the offline translator, keyed by (source, target)
+PHRASE_TABLE_PATHS = {
+    ("es", "en"): os.path.join(os.path.dirname(__file__), "phrase_table_es_en.tsv"),
+}
+
+# Worker threads per article pipeline stage; each fetch worker runs its own browser
+PIPELINE_WORKERS = {
+    "fetch": 1,
+    "extract": 1,
+    "image": 2,
+    "translate": 2,
+    "sink": 1,
+}
+PIPELINE_QUEUE_SIZE = 8 # Items buffered between stages before upstream blocks
+STORE_BATCH_SIZE = 50 # Articles the sink stage upserts per store transaction
+
+# Optional cap on WebDriver commands per article; over budget either only
+# logs ("log") or fails the article ("abort")
+WEBDRIVER_COMMAND_BUDGET = None
+WEBDRIVER_BUDGET_ACTION = "log"
@@ -0,0 +1,166 @@
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+import numpy as np
+from .analyse import tokenize
+from .store import ArticleStore, processing_metadata
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+class MinHasher:
+    """MinHash signatures over word shingles
+
+    Each shingle of shingle_size consecutive tokens is hashed with crc32,
+    then num_perm universal hash functions (a * x + b) mod p are applied to
+    all shingles at once; the signature is the minimum per function. The
+    fraction of equal signature slots estimates the Jaccard similarity of
+    two shingle sets.
+    """
+
+    def __init__(self, num_perm=128, shingle_size=5, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)[:, None]
+
+    def shingles(self, text):
+        tokens = tokenize(text or "")
+        if not tokens:
+            return np.empty(0, dtype=np.uint64)
+        n = min(self.shingle_size, len(tokens))
+        hashes = {zlib.crc32(" ".join(tokens[i:i + n]).encode('utf-8')) for i in range(len(tokens) - n + 1)}
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, text):
+        """uint32 signature of length num_perm, or None for text without tokens"""
+        shingles = self.shingles(text)
+        if not shingles.size:
+            return None
+        # a, b < 2**31 and crc32 < 2**32, so a * x + b fits in uint64
+        return ((self._a * shingles + self._b) % MERSENNE_PRIME).min(axis=1).astype(np.uint32)
+
+    @staticmethod
+    def similarity(a, b):
+        return float(np.count_nonzero(a == b)) / len(a)
+
+class DuplicateIndex:
+    """Near-duplicate detection for article content with MinHash and LSH
+
+    Signatures are split into bands; two articles become candidates when
+    any band hashes to the same bucket, so a lookup only reads the buckets
+    of the new article instead of comparing it to the whole archive.
+    Candidates are then confirmed by estimated Jaccard similarity against
+    threshold. Only originals are bucketed, so a duplicate always links to
+    the first copy seen. With 16 bands of 8 rows, pairs around 0.7
+    similarity become candidates half the time and pairs at 0.8 almost
+    always do.
+
+        index = DuplicateIndex()
+        match = index.check(article)  # (original_url, similarity) or None
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS signatures (
+            url TEXT PRIMARY KEY,
+            signature BLOB NOT NULL,
+            duplicate_of TEXT,
+            similarity REAL
+        );
+        CREATE TABLE IF NOT EXISTS buckets (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            url TEXT NOT NULL,
+            PRIMARY KEY (band, bucket, url)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_signatures_duplicate ON signatures(duplicate_of);
+        CREATE INDEX IF NOT EXISTS idx_buckets_url ON buckets(url);
+    """
+
+    def __init__(self, db_path="data/duplicates.sqlite3", num_perm=128, bands=16, threshold=0.8, shingle_size=5):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.db_path = db_path
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm, shingle_size)
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    def _buckets(self, signature):
+        return [(band, zlib.crc32(signature[band * self.rows:(band + 1) * self.rows].tobytes()))
+                for band in range(self.bands)]
+
+    def _candidates(self, buckets, exclude=None):
+        urls = set()
+        for band, bucket in buckets:
+            urls.update(row[0] for row in self._conn.execute(
+                "SELECT url FROM buckets WHERE band = ? AND bucket = ?", (band, bucket)))
+        urls.discard(exclude)
+        return urls
+
+    def _best_match(self, signature, candidates):
+        best = None
+        for url in candidates:
+            row = self._conn.execute("SELECT signature FROM signatures WHERE url = ?", (url,)).fetchone()
+            similarity = MinHasher.similarity(signature, np.frombuffer(row[0], dtype=np.uint32))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (url, similarity)
+        return best
+
+    def check(self, article):
+        """Record an article and return (original_url, similarity) if it near-duplicates an earlier one
+
+        Articles without extracted content are not recorded and never match.
+        Checking a URL again re-evaluates it against the other articles.
+        """
+        url = article.get('url')
+        if not url or not processing_metadata(article)['content_extracted']:
+            return None
+        signature = self.hasher.signature(article.get('content'))
+        if signature is None:
+            return None
+        url = ArticleStore.canonical_url(url)
+        buckets = self._buckets(signature)
+
+        with self._lock, self._conn:
+            match = self._best_match(signature, self._candidates(buckets, exclude=url))
+            self._conn.execute("DELETE FROM buckets WHERE url = ?", (url,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO signatures (url, signature, duplicate_of, similarity) VALUES (?, ?, ?, ?)",
+                (url, signature.tobytes(), match and match[0], match and match[1])
+            )
+            if match is None:
+                self._conn.executemany("INSERT INTO buckets (band, bucket, url) VALUES (?, ?, ?)",
+                                       [(band, bucket, url) for band, bucket in buckets])
+        return match
+
+    def build_from_store(self, store, **filters):
+        """Check every stored article, oldest first; returns the (url, original_url, similarity) links found"""
+        checked = 0
+        links = []
+        for row in store.iter_query(oldest_first=True, **filters):
+            checked += 1
+            match = self.check(row)
+            if match:
+                links.append((row['url'], *match))
+        logger.info(f"Checked {checked} stored articles, {len(links)} near-duplicates")
+        return links
+
+    def duplicates_of(self, url):
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT url FROM signatures WHERE duplicate_of = ?", (ArticleStore.canonical_url(url),))]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
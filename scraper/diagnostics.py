@@ -2,7 +2,8 @@ import logging
 import json
 import os
 from datetime import datetime
-from selenium.webdriver.common.by import By
+from .htmlpage import By
+from .tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -118,7 +119,8 @@ class FailureDiagnostics:
             "statistics": session_stats,
             "total_failures": len(self.failure_log),
             "total_paywall_detections": len(self.paywall_log),
-            "paywall_detection_rate": len([p for p in self.paywall_log if p['has_paywall']]) / max(len(self.paywall_log), 1)
+            "paywall_detection_rate": len([p for p in self.paywall_log if p['has_paywall']]) / max(len(self.paywall_log), 1),
+            "timings": tracer.snapshot()
         }
         
         # Save to file
@@ -132,6 +134,13 @@ class FailureDiagnostics:
             logger.info(f"Session statistics saved to {stats_path}")
         except Exception as e:
             logger.error(f"Failed to save session statistics: {e}")
+        
+        # Same timings in Prometheus text format, e.g. for a node_exporter textfile collector
+        try:
+            metrics_path = tracer.write_prometheus(os.path.join(self.diagnostics_dir, f"metrics_{self.session_id}.prom"))
+            logger.info(f"Timing metrics saved to {metrics_path}")
+        except Exception as e:
+            logger.error(f"Failed to save timing metrics: {e}")
     
     def generate_failure_report(self):
         """Generate comprehensive failure analysis report"""
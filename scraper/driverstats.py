@@ -0,0 +1,168 @@
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+class CommandBudgetExceeded(Exception):
+    pass
+
+class CommandStats:
+    """WebDriver command totals across articles and fetch workers"""
+
+    def __init__(self):
+        self.articles = 0
+        self.commands = 0
+        self.wire_seconds = 0.0
+        self.budget_exceeded = 0
+        self.max_article_commands = 0
+        self.by_command = Counter()
+        self.seconds_by_command = Counter()
+        self.by_call_site = Counter()
+        self.seconds_by_call_site = Counter()
+        self._lock = threading.Lock()
+
+    def record_article(self, article):
+        with self._lock:
+            self.articles += 1
+            self.commands += article["commands"]
+            self.wire_seconds += article["wire_seconds"]
+            self.budget_exceeded += article["budget_exceeded"]
+            self.max_article_commands = max(self.max_article_commands, article["commands"])
+            self.by_command.update(article["by_command"])
+            self.seconds_by_command.update(article["seconds_by_command"])
+            self.by_call_site.update(article["by_call_site"])
+            self.seconds_by_call_site.update(article["seconds_by_call_site"])
+
+    def heaviest_call_sites(self, n=10):
+        """(call site, commands, wire seconds) for the n call sites with the most wire time"""
+        with self._lock:
+            return [(site, self.by_call_site[site], round(seconds, 4))
+                    for site, seconds in self.seconds_by_call_site.most_common(n)]
+
+    def snapshot(self, top=10):
+        with self._lock:
+            articles = max(self.articles, 1)
+            totals = {
+                "articles": self.articles,
+                "commands": self.commands,
+                "wire_seconds": round(self.wire_seconds, 4),
+                "commands_per_article": round(self.commands / articles, 1),
+                "wire_seconds_per_article": round(self.wire_seconds / articles, 4),
+                "max_article_commands": self.max_article_commands,
+                "budget_exceeded": self.budget_exceeded,
+                "by_command": dict(self.by_command.most_common()),
+            }
+        totals["heaviest_call_sites"] = [
+            {"call_site": site, "commands": commands, "wire_seconds": seconds}
+            for site, commands, seconds in self.heaviest_call_sites(top)
+        ]
+        return totals
+
+class CommandMonitor:
+    """Counts and times every WebDriver command a driver sends
+
+    install() replaces the driver instance's execute method, which every
+    WebDriver and WebElement call goes through, so find_elements, .text and
+    get_attribute on elements are all counted. Each command is recorded by
+    type and by the first calling frame outside Selenium. With a budget, an
+    article that needs more commands than that is logged (on_budget="log"),
+    or aborted (on_budget="abort"): every further command for that article
+    raises CommandBudgetExceeded.
+
+        monitor = CommandMonitor(driver, budget=400).install()
+        monitor.begin_article(url)
+        ...
+        stats = monitor.end_article()
+    """
+
+    def __init__(self, driver, budget=None, on_budget="log", stats=None):
+        if on_budget not in ("log", "abort"):
+            raise ValueError(f"on_budget must be 'log' or 'abort', not {on_budget!r}")
+        self.driver = driver
+        self.budget = budget
+        self.on_budget = on_budget
+        self.stats = stats
+        self._original_execute = None
+        self._reset(None)
+
+    def _reset(self, label):
+        self.label = label
+        self.commands = 0
+        self.wire_seconds = 0.0
+        self.exceeded = False
+        self.by_command = Counter()
+        self.seconds_by_command = Counter()
+        self.by_call_site = Counter()
+        self.seconds_by_call_site = Counter()
+
+    def install(self):
+        if self._original_execute is None:
+            self._original_execute = self.driver.execute
+            self.driver.execute = self._execute
+        return self
+
+    def uninstall(self):
+        if self._original_execute is not None:
+            del self.driver.execute
+            self._original_execute = None
+
+    @property
+    def aborted(self):
+        return self.exceeded and self.on_budget == "abort"
+
+    @staticmethod
+    def _call_site():
+        frame = sys._getframe(2)
+        while frame is not None:
+            module = frame.f_globals.get('__name__', '')
+            if not module.startswith('selenium') and module != __name__:
+                return f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+            frame = frame.f_back
+        return "unknown"
+
+    def _execute(self, driver_command, params=None):
+        if self.aborted:
+            raise CommandBudgetExceeded(f"Command budget of {self.budget} exceeded for {self.label}")
+        if self.budget is not None and self.commands >= self.budget and not self.exceeded:
+            self.exceeded = True
+            logger.warning(f"{self.label}: WebDriver command budget of {self.budget} exceeded "
+                           f"({self.on_budget})")
+            if self.aborted:
+                raise CommandBudgetExceeded(f"Command budget of {self.budget} exceeded for {self.label}")
+
+        call_site = self._call_site()
+        started = time.perf_counter()
+        try:
+            return self._original_execute(driver_command, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.commands += 1
+            self.wire_seconds += elapsed
+            self.by_command[driver_command] += 1
+            self.seconds_by_command[driver_command] += elapsed
+            self.by_call_site[call_site] += 1
+            self.seconds_by_call_site[call_site] += elapsed
+
+    def begin_article(self, label):
+        self._reset(label)
+
+    def end_article(self):
+        """Per-article totals, also added to the shared CommandStats"""
+        article = {
+            "label": self.label,
+            "commands": self.commands,
+            "wire_seconds": self.wire_seconds,
+            "budget_exceeded": self.exceeded,
+            "by_command": self.by_command,
+            "seconds_by_command": self.seconds_by_command,
+            "by_call_site": self.by_call_site,
+            "seconds_by_call_site": self.seconds_by_call_site,
+        }
+        logger.debug(f"{self.label}: {self.commands} WebDriver commands, {self.wire_seconds:.2f}s on the wire")
+        if self.stats is not None:
+            self.stats.record_article(article)
+        self._reset(None)
+        return article
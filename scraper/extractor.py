@@ -1,10 +1,8 @@
 import logging
 import json
 import re
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from .htmlpage import By, StaticBrowser
+from .tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -46,54 +44,51 @@ class EnhancedContentExtractor:
     
     def extract_content_comprehensive(self, driver, url):
         """Comprehensive content extraction using multiple methods"""
+        methods = [
+            # Method 1: Primary content selectors
+            ('primary_selectors', lambda: self._extract_with_selectors(driver, self.content_selectors['primary'])),
+            # Method 2: Secondary content selectors
+            ('secondary_selectors', lambda: self._extract_with_selectors(driver, self.content_selectors['secondary'])),
+            # Method 3: Structured data extraction (JSON-LD)
+            ('structured_data', lambda: self._extract_structured_data(driver)),
+            # Method 4: Meta tag extraction
+            ('meta_tags', lambda: self._extract_meta_content(driver)),
+            # Method 5: Full-text search and extraction
+            ('full_text_analysis', lambda: self._extract_full_text_analysis(driver)),
+            # Method 6: Fallback selectors
+            ('fallback_selectors', lambda: self._extract_with_selectors(driver, self.content_selectors['fallback'])),
+        ]
         
-        # Method 1: Primary content selectors
-        content = self._extract_with_selectors(driver, self.content_selectors['primary'])
-        if content:
-            self.last_successful_method = 'primary_selectors'
-            return content
-        
-        # Method 2: Secondary content selectors
-        content = self._extract_with_selectors(driver, self.content_selectors['secondary'])
-        if content:
-            self.last_successful_method = 'secondary_selectors'
-            return content
-        
-        # Method 3: Structured data extraction (JSON-LD)
-        content = self._extract_structured_data(driver)
-        if content:
-            self.last_successful_method = 'structured_data'
-            return content
-        
-        # Method 4: Meta tag extraction
-        content = self._extract_meta_content(driver)
-        if content:
-            self.last_successful_method = 'meta_tags'
-            return content
-        
-        # Method 5: Full-text search and extraction
-        content = self._extract_full_text_analysis(driver)
-        if content:
-            self.last_successful_method = 'full_text_analysis'
-            return content
-        
-        # Method 6: Fallback selectors
-        content = self._extract_with_selectors(driver, self.content_selectors['fallback'])
-        if content:
-            self.last_successful_method = 'fallback_selectors'
-            return content
+        for method, extract in methods:
+            with tracer.span("extraction", strategy=method):
+                content = extract()
+            if content:
+                self.last_successful_method = method
+                return content
         
         logger.warning(f"All extraction methods failed for {url}")
         self.last_successful_method = None
         return "Content could not be extracted"
     
+    def extract_content_from_html(self, html, url=None):
+        """Run the same extraction strategies over an HTML string, without a browser"""
+        return self.extract_content_comprehensive(StaticBrowser().load_html(html, url), url)
+    
     def _extract_with_selectors(self, driver, selectors):
         """Extract content using CSS selectors"""
+        static = getattr(driver, 'static', False)
+        if not static:
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
+        
         for selector in selectors:
             try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                )
+                # Static pages are fully parsed already; there is nothing to wait for
+                if not static:
+                    with tracer.span("driver.wait", target="content_selector"):
+                        WebDriverWait(driver, 10).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+                        )
                 
                 paragraphs = driver.find_elements(By.CSS_SELECTOR, selector)
                 meaningful_paragraphs = []
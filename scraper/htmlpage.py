@@ -0,0 +1,127 @@
+import logging
+from urllib.parse import urljoin
+
+logger = logging.getLogger(__name__)
+
+class By:
+    """W3C locator strategies; the same strings selenium.webdriver.common.by.By uses
+
+    Kept here so the shared detection and extraction code can run against
+    static HTML without importing Selenium.
+    """
+    CSS_SELECTOR = "css selector"
+    TAG_NAME = "tag name"
+    XPATH = "xpath"
+
+class ElementNotFound(Exception):
+    pass
+
+_NON_TEXT_TAGS = {'script', 'style', 'noscript', 'template'}
+
+def _visible_text(node):
+    parts = []
+    for string in node.find_all(string=True):
+        if string.parent is not None and string.parent.name in _NON_TEXT_TAGS:
+            continue
+        parts.append(string)
+    return " ".join(" ".join(parts).split())
+
+class _Searchable:
+    """find_element(s) over a BeautifulSoup node, mirroring the WebDriver API"""
+
+    def find_elements(self, by, value):
+        if by == By.CSS_SELECTOR:
+            nodes = self._node.select(value)
+        elif by == By.TAG_NAME:
+            nodes = self._node.find_all(value)
+        elif by == By.XPATH and value == '..':
+            nodes = [self._node.parent] if self._node.parent is not None else []
+        else:
+            raise ValueError(f"Unsupported locator for static pages: {by} {value}")
+        return [HtmlElement(node, self._page) for node in nodes]
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise ElementNotFound(f"No element matches {by} {value}")
+        return elements[0]
+
+class HtmlElement(_Searchable):
+    """Read-only stand-in for a WebElement"""
+
+    def __init__(self, node, page):
+        self._node = node
+        self._page = page
+
+    @property
+    def tag_name(self):
+        return self._node.name
+
+    @property
+    def text(self):
+        return _visible_text(self._node)
+
+    def get_attribute(self, name):
+        if name == 'innerHTML':
+            return self._node.decode_contents()
+        value = self._node.get(name)
+        if isinstance(value, list):
+            value = " ".join(value)
+        if value and name in ('href', 'src'):
+            # WebDriver returns the resolved URL for these properties
+            value = urljoin(self._page.current_url, value)
+        return value
+
+class StaticBrowser(_Searchable):
+    """Fetches pages over HTTP and exposes the subset of the WebDriver API the scraper uses
+
+    The http engine hands this to the same paywall detection, content
+    extraction and image discovery code as a real browser, minus the
+    JavaScript: pages are fetched with a pooled requests session and parsed
+    with BeautifulSoup.
+    """
+
+    static = True
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8'
+    }
+
+    def __init__(self, timeout=20):
+        self.timeout = timeout
+        self.current_url = None
+        self.page_source = ""
+        self._session = None
+        self._node = None
+        self._page = self
+
+    def load_html(self, html, url=None):
+        """Parse HTML that was fetched elsewhere (e.g. re-extracting an archived page)"""
+        from bs4 import BeautifulSoup
+
+        self.current_url = url
+        self.page_source = html
+        self._node = BeautifulSoup(html, 'lxml')
+        return self
+
+    def get(self, url):
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+            self._session.headers.update(self.headers)
+        response = self._session.get(url, timeout=self.timeout)
+        if response.status_code >= 400:
+            logger.warning(f"HTTP {response.status_code} for {url}")
+        self.load_html(response.text, response.url)
+
+    @property
+    def title(self):
+        node = self._node.title if self._node is not None else None
+        return node.get_text(strip=True) if node else ""
+
+    def quit(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
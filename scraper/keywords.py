@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import threading
+import numpy as np
+from .analyse import tokenize, stopwords_for
+from .store import FAILED_CONTENT
+
+logger = logging.getLogger(__name__)
+
+def keyword_text(article):
+    """Title plus extracted content, the text keywords are taken from"""
+    content = article.get('content')
+    if not content or content == FAILED_CONTENT:
+        content = ""
+    return f"{article.get('title') or ''} {content}"
+
+class KeywordExtractor:
+    """TF-IDF keywords per article against archive-wide document frequencies
+
+    The vocabulary maps each term to an id, and document frequencies live
+    in one int32 array indexed by id, saved as root/df.npy next to
+    root/vocab.json. extract() scores a whole batch at once: the batch
+    becomes (document, term) pairs, which np.unique turns into per-document
+    term counts, and one lexsort ranks every document's terms together.
+    By default the batch's documents are counted into the document
+    frequencies first. Statistics are saved on save() or close().
+
+        extractor = KeywordExtractor()
+        extractor.extract([keyword_text(a) for a in articles])
+        extractor.close()
+    """
+
+    def __init__(self, root="data/keywords", stopwords=("es", "en"), top_k=8, min_length=3):
+        self.root = root
+        self.stopwords = stopwords_for(stopwords)
+        self.top_k = top_k
+        self.min_length = min_length
+        self.vocab_path = os.path.join(root, "vocab.json")
+        self.df_path = os.path.join(root, "df.npy")
+        self.terms = []
+        self.documents = 0
+        self.df = np.zeros(0, dtype=np.int32)
+        if os.path.exists(self.vocab_path):
+            with open(self.vocab_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.terms = state["terms"]
+            self.documents = state["documents"]
+            self.df = np.load(self.df_path)[:len(self.terms)]
+        self._ids = {term: term_id for term_id, term in enumerate(self.terms)}
+        self._lock = threading.Lock()
+
+    def _term_ids(self, text):
+        ids = []
+        for token in tokenize(text or ""):
+            if len(token) < self.min_length or token.isdigit() or token in self.stopwords:
+                continue
+            term_id = self._ids.get(token)
+            if term_id is None:
+                term_id = self._ids[token] = len(self.terms)
+                self.terms.append(token)
+            ids.append(term_id)
+        return ids
+
+    def extract(self, texts, update=True):
+        """Top (term, score) pairs for each text, in order; update=False leaves the statistics alone"""
+        with self._lock:
+            ids = [self._term_ids(text) for text in texts]
+            vocab_size = len(self.terms)
+            if len(self.df) < vocab_size:
+                self.df = np.concatenate([self.df, np.zeros(vocab_size - len(self.df), dtype=np.int32)])
+
+            lengths = np.fromiter((len(doc_ids) for doc_ids in ids), dtype=np.int64, count=len(ids))
+            if not lengths.sum():
+                return [[] for _ in texts]
+            rows = np.repeat(np.arange(len(ids), dtype=np.int64), lengths)
+            cols = np.fromiter((term_id for doc_ids in ids for term_id in doc_ids), dtype=np.int64,
+                               count=int(lengths.sum()))
+            pairs, counts = np.unique(rows * vocab_size + cols, return_counts=True)
+            rows, cols = pairs // vocab_size, pairs % vocab_size
+
+            if update:
+                self.df += np.bincount(cols, minlength=vocab_size).astype(np.int32)
+                self.documents += int(np.count_nonzero(lengths))
+            idf = np.log((1 + self.documents) / (1 + self.df[cols])) + 1
+            scores = counts / lengths[rows] * idf
+
+            # Sort by document, then by descending score; keep the first top_k of each document
+            order = np.lexsort((-scores, rows))
+            rows, cols, scores = rows[order], cols[order], scores[order]
+            rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side='left')
+            keep = rank < self.top_k
+
+            keywords = [[] for _ in texts]
+            for row, col, score in zip(rows[keep].tolist(), cols[keep].tolist(), scores[keep].tolist()):
+                keywords[row].append((self.terms[col], round(score, 4)))
+            return keywords
+
+    def extract_articles(self, articles, update=True):
+        """Set article['keywords'] to the keyword terms of each article in the batch"""
+        for article, keywords in zip(articles, self.extract([keyword_text(a) for a in articles], update)):
+            article['keywords'] = [term for term, _ in keywords]
+        return articles
+
+    def save(self):
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            np.save(self.df_path + ".tmp.npy", self.df)
+            os.replace(self.df_path + ".tmp.npy", self.df_path)
+            tmp_path = self.vocab_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"documents": self.documents, "terms": self.terms}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.vocab_path)
+        logger.info(f"Saved document frequencies for {len(self.terms)} terms over {self.documents} documents")
+
+    def close(self):
+        self.save()
@@ -0,0 +1,94 @@
+import re
+import zlib
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Small reference corpora the character n-gram profiles are built from.
+# They only need to capture the letter patterns and function words of each
+# language, not cover its vocabulary.
+REFERENCE_TEXTS = {
+    "es": """
+        El gobierno de España aprobó ayer una nueva ley que cambia las reglas del
+        mercado de trabajo. Según los expertos, la reforma llega tarde y no resuelve
+        los problemas de fondo, aunque reconocen que es un paso en la buena dirección.
+        La oposición criticó que no se haya consultado a los sindicatos ni a las
+        comunidades autónomas. Los ciudadanos esperan que la economía mejore durante
+        los próximos meses, pero la inflación y el precio de la vivienda siguen
+        siendo sus principales preocupaciones. En su artículo de opinión, la autora
+        defiende que la democracia necesita instituciones fuertes y una prensa libre
+        que pueda contar lo que ocurre sin miedo. También recuerda que la memoria
+        histórica forma parte de la identidad de un país y que olvidar el pasado
+        tiene consecuencias. Por eso pide a los partidos políticos que dejen de lado
+        sus diferencias y trabajen juntos por el bien común. Hay que escuchar a los
+        jóvenes, que han sufrido más que nadie la crisis y la falta de oportunidades.
+        Quizá el verano traiga noticias mejores, o quizá no; lo que está claro es
+        que la sociedad española ya no acepta excusas. Cada vez más personas se
+        preguntan por qué las promesas electorales nunca se cumplen.
+    """,
+    "en": """
+        The government approved a new law yesterday that changes the rules of the
+        labour market. According to experts, the reform comes late and does not
+        solve the underlying problems, although they admit it is a step in the right
+        direction. The opposition complained that neither the unions nor the regions
+        had been consulted. Citizens hope that the economy will improve over the
+        coming months, but inflation and the price of housing remain their main
+        concerns. In her opinion piece, the author argues that democracy needs strong
+        institutions and a free press that can report what happens without fear. She
+        also recalls that historical memory is part of a country's identity and that
+        forgetting the past has consequences. That is why she asks the political
+        parties to put aside their differences and work together for the common good.
+        We must listen to young people, who have suffered more than anyone from the
+        crisis and the lack of opportunities. Perhaps the summer will bring better
+        news, or perhaps not; what is clear is that society no longer accepts
+        excuses. More and more people wonder why election promises are never kept.
+    """,
+}
+
+
+class LanguageIdentifier:
+    """Character n-gram language identifier with precomputed NumPy weights
+
+    Each language profile is a vector of smoothed log-probabilities over
+    hashed character n-grams. Scoring a text is one bincount and one
+    matrix-vector product.
+    """
+
+    def __init__(self, reference_texts=None, ngram_sizes=(1, 2, 3), num_buckets=4096):
+        reference_texts = reference_texts or REFERENCE_TEXTS
+        self.ngram_sizes = ngram_sizes
+        self.num_buckets = num_buckets
+        self.languages = list(reference_texts)
+
+        counts = np.stack([self._bucket_counts(text) for text in reference_texts.values()])
+        smoothed = counts + 0.5
+        self.weights = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+
+    def _ngram_buckets(self, text):
+        text = " " + re.sub(r"[^\w]+", " ", text.lower()).strip() + " "
+        buckets = []
+        for n in self.ngram_sizes:
+            for i in range(len(text) - n + 1):
+                gram = text[i:i + n]
+                if gram != " " * n:
+                    buckets.append(zlib.crc32(gram.encode("utf-8")) % self.num_buckets)
+        return np.asarray(buckets, dtype=np.int64)
+
+    def _bucket_counts(self, text):
+        return np.bincount(self._ngram_buckets(text), minlength=self.num_buckets).astype(np.float64)
+
+    def detect(self, text):
+        """Return (language, confidence) for text, or (None, 0.0) if it has no letters"""
+        counts = self._bucket_counts(text)
+        total = counts.sum()
+        if total == 0:
+            return None, 0.0
+
+        scores = self.weights @ counts / total
+        # Softmax over per-n-gram average log-likelihoods, sharpened so short
+        # texts still get a decisive answer when one profile clearly fits
+        probabilities = np.exp((scores - scores.max()) * 8.0)
+        probabilities /= probabilities.sum()
+        best = int(np.argmax(probabilities))
+        return self.languages[best], float(probabilities[best])
@@ -0,0 +1,177 @@
+# scraper/mock_server.py - local stand-in for the MyMemory and LibreTranslate APIs
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from .translate import PhraseTableTranslator
+
+logger = logging.getLogger(__name__)
+
+class MockTranslationServer:
+    """Local HTTP server speaking the MyMemory and LibreTranslate formats
+
+    Translations come from the offline phrase table, so responses are
+    deterministic. Latency, server errors and 429 rate-limit responses can be
+    injected to load-test TranslationService without touching real quotas.
+    The MyMemory endpoint translates each newline-separated line on its own,
+    so packed requests always split back cleanly; the real API gives no such
+    guarantee.
+
+        with MockTranslationServer(latency=0.05, rate_limit_rate=0.1) as server:
+            service = TranslationService(endpoints=server.endpoints)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate_limit_rate=0.0, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.random = random.Random(seed)
+        self.request_counts = {"mymemory": 0, "libre": 0, "errors": 0, "rate_limited": 0}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    @property
+    def endpoints(self):
+        """Endpoint overrides for TranslationService"""
+        return {"mymemory": f"{self.base_url}/get", "libre_fixed": f"{self.base_url}/translate"}
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Mock translation server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _translate(self, text, source, target):
+        engine = PhraseTableTranslator.for_pair(source, target)
+        return engine.translate(text) if engine else f"[{target}] {text}"
+
+    def _inject_fault(self):
+        """Sleep for the configured latency, then pick an injected status or None"""
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            roll = self.random.random()
+            if roll < self.rate_limit_rate:
+                self.request_counts["rate_limited"] += 1
+                return 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.request_counts["errors"] += 1
+                return 500
+        return None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path != "/get":
+                    self._send_json(404, {"error": "not found"})
+                    return
+                with server._lock:
+                    server.request_counts["mymemory"] += 1
+
+                fault = server._inject_fault()
+                if fault:
+                    self._send_json(fault, {"responseStatus": fault, "responseDetails": "injected failure"})
+                    return
+
+                params = parse_qs(parts.query)
+                text = params.get("q", [""])[0]
+                source, _, target = params.get("langpair", ["es|en"])[0].partition("|")
+                translated = "\n".join(server._translate(line, source, target) for line in text.split("\n"))
+                self._send_json(200, {"responseStatus": 200, "responseData": {"translatedText": translated}})
+
+            def do_POST(self):
+                if urlsplit(self.path).path != "/translate":
+                    self._send_json(404, {"error": "not found"})
+                    return
+                with server._lock:
+                    server.request_counts["libre"] += 1
+
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    self._send_json(400, {"error": "invalid JSON"})
+                    return
+
+                fault = server._inject_fault()
+                if fault:
+                    self._send_json(fault, {"error": "injected failure"})
+                    return
+
+                source = payload.get("source", "es")
+                target = payload.get("target", "en")
+                q = payload.get("q", "")
+                if isinstance(q, list):
+                    translated = [server._translate(text, source, target) for text in q]
+                else:
+                    translated = server._translate(q, source, target)
+                self._send_json(200, {"translatedText": translated})
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the MyMemory and LibreTranslate APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.05, help="base response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429 responses")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = MockTranslationServer(args.host, args.port, args.latency, args.jitter,
+                                   args.error_rate, args.rate_limit_rate).start()
+    print(f"MyMemory endpoint:       {server.endpoints['mymemory']}")
+    print(f"LibreTranslate endpoint: {server.endpoints['libre_fixed']}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
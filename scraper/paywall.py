@@ -1,21 +1,193 @@
-import requests
 import time
 import random
+import threading
 import logging
-from urllib.parse import urljoin, quote_plus
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import json
 import re
+import os
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .htmlpage import By
+from .tracing import tracer
 
 logger = logging.getLogger(__name__)
 
+# Confidence above which detect_paywall reports a paywall
+PAYWALL_THRESHOLD = 0.3
+
+# Maps bypass recommendations to the method name reported on success
+BYPASS_METHODS = {
+    'try_archive_services': 'archive_service',
+    'rotate_user_agent': 'user_agent_rotation',
+    'try_rss_feed': 'rss_feed',
+    'extract_meta_content': 'meta_extraction'
+}
+
+
+class PaywallVerdictCache:
+    """Cache paywall verdicts by URL and by section/template fingerprint
+    
+    Updates are written to cache_file every save_every changes and on
+    flush()/close(); expired verdicts are evicted whenever it is written.
+    """
+    
+    def __init__(self, cache_file="data/cache/paywall_verdicts.json", base_ttl=6 * 3600,
+                 min_template_observations=3, save_every=50):
+        self.cache_file = cache_file
+        self.base_ttl = base_ttl
+        self.min_template_observations = min_template_observations
+        self.save_every = save_every
+        self.url_verdicts = {}
+        self.template_verdicts = {}
+        self.hits = 0
+        self.misses = 0
+        self._unsaved = 0
+        # Pipeline fetch workers share one cache
+        self._lock = threading.RLock()
+        self._load()
+    
+    @staticmethod
+    def template_fingerprint(url):
+        """Reduce a URL to its host, section prefix and path template"""
+        parts = urlsplit(url.lower())
+        segments = [s for s in parts.path.split('/') if s]
+        template = []
+        for i, segment in enumerate(segments):
+            if re.fullmatch(r'\d{4}-\d{2}-\d{2}', segment):
+                template.append('{date}')
+            elif segment.isdigit():
+                template.append('{n}')
+            elif i == len(segments) - 1 and (len(segments) > 1 or '.' in segment):
+                extension = os.path.splitext(segment)[1]
+                template.append('{slug}' + extension)
+            else:
+                template.append(segment)
+        return f"{parts.netloc}/{'/'.join(template)}"
+    
+    def _ttl(self, confidence, observations=None):
+        """Verdicts far from the detection threshold live longer"""
+        margin = min(abs(confidence - PAYWALL_THRESHOLD) / PAYWALL_THRESHOLD, 1.0)
+        ttl = self.base_ttl * margin
+        if observations is not None:
+            ttl *= min(observations / self.min_template_observations, 1.0)
+        return ttl
+    
+    def lookup(self, url):
+        """Return a cached verdict for the URL or its template, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self.url_verdicts.get(url)
+            source = 'url'
+            if not entry or entry['expires_at'] <= now:
+                entry = self.template_verdicts.get(self.template_fingerprint(url))
+                source = 'template'
+                if (not entry or entry['expires_at'] <= now or
+                        entry['observations'] < self.min_template_observations):
+                    self.misses += 1
+                    return None
+            
+            self.hits += 1
+            return dict(entry, source=source)
+    
+    def store(self, url, detection_results):
+        """Record a fresh detection verdict for the URL and its template"""
+        with self._lock:
+            self._store(url, detection_results)
+            self._changed()
+    
+    def _store(self, url, detection_results):
+        now = time.time()
+        has_paywall = detection_results['has_paywall']
+        confidence = detection_results['confidence']
+        
+        previous = self.url_verdicts.get(url, {})
+        self.url_verdicts[url] = {
+            'has_paywall': has_paywall,
+            'confidence': confidence,
+            'bypass_method': previous.get('bypass_method') if has_paywall else None,
+            'expires_at': now + self._ttl(confidence)
+        }
+        
+        fingerprint = self.template_fingerprint(url)
+        template = self.template_verdicts.get(fingerprint)
+        if template and template['has_paywall'] == has_paywall:
+            observations = template['observations'] + 1
+            # Running mean keeps one outlier page from dominating the template
+            confidence = template['confidence'] + (confidence - template['confidence']) / observations
+            bypass_method = template.get('bypass_method')
+        else:
+            observations = 1
+            bypass_method = None
+        
+        self.template_verdicts[fingerprint] = {
+            'has_paywall': has_paywall,
+            'confidence': confidence,
+            'observations': observations,
+            'bypass_method': bypass_method,
+            'expires_at': now + self._ttl(confidence, observations)
+        }
+    
+    def record_bypass(self, url, method):
+        """Remember which bypass method worked for the URL and its template"""
+        with self._lock:
+            for entry in (self.url_verdicts.get(url),
+                          self.template_verdicts.get(self.template_fingerprint(url))):
+                if entry and entry['has_paywall']:
+                    entry['bypass_method'] = method
+            self._changed()
+    
+    def _changed(self):
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self._save()
+    
+    def _evict_expired(self):
+        now = time.time()
+        for verdicts in (self.url_verdicts, self.template_verdicts):
+            for key in [key for key, entry in verdicts.items() if entry['expires_at'] <= now]:
+                del verdicts[key]
+    
+    def flush(self):
+        """Write pending updates to cache_file"""
+        with self._lock:
+            if self._unsaved:
+                self._save()
+    
+    def close(self):
+        self.flush()
+    
+    def _load(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            now = time.time()
+            self.url_verdicts = {k: v for k, v in data.get('urls', {}).items() if v['expires_at'] > now}
+            self.template_verdicts = {k: v for k, v in data.get('templates', {}).items() if v['expires_at'] > now}
+        except Exception as e:
+            logger.warning(f"Could not load paywall verdict cache: {e}")
+    
+    def _save(self):
+        self._evict_expired()
+        self._unsaved = 0
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            tmp_file = self.cache_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'urls': self.url_verdicts, 'templates': self.template_verdicts}, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            logger.warning(f"Could not save paywall verdict cache: {e}")
+
+
 class PaywallDetector:
     """Paywall detection and bypass"""
     
-    def __init__(self):
+    def __init__(self, verdict_cache=None):
+        self.verdict_cache = verdict_cache if verdict_cache is not None else PaywallVerdictCache()
         self.paywall_indicators = {
             'spanish': [
                 'suscríbete', 'suscribirse', 'regístrate', 'iniciar sesión',
@@ -37,6 +209,13 @@ class PaywallDetector:
             '[data-paywall]', '.content-gate', '.access-wall'
         ]
         
+        self.bypass_content_selectors = [
+            '.a_c p', '.articulo-cuerpo p', '.article-body p',
+            '.story-body p', 'article p', '.content p',
+            '.post-content p', '.entry-content p'
+        ]
+        
+        self._session = None
         self.user_agents = [
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -50,6 +229,12 @@ class PaywallDetector:
     
     def detect_paywall(self, driver, url):
         """Paywall detection"""
+        cached = self.verdict_cache.lookup(url)
+        if cached:
+            logger.info(f"Paywall verdict from {cached['source']} cache - "
+                       f"Paywall: {cached['has_paywall']}, Confidence: {cached['confidence']:.2f}")
+            return self._results_from_cache(cached)
+        
         detection_results = {
             'has_paywall': False,
             'confidence': 0.0,
@@ -114,27 +299,52 @@ class PaywallDetector:
             total_indicators = text_indicators + dom_indicators + content_indicators + url_indicators
             max_possible = 10  # Reasonable maximum
             detection_results['confidence'] = min(total_indicators / max_possible, 1.0)
-            detection_results['has_paywall'] = detection_results['confidence'] > 0.3
+            detection_results['has_paywall'] = detection_results['confidence'] > PAYWALL_THRESHOLD
             
             # Generate bypass recommendations
             if detection_results['has_paywall']:
-                detection_results['bypass_recommendations'] = [
-                    'try_archive_services',
-                    'rotate_user_agent',
-                    'clear_cookies',
-                    'try_rss_feed',
-                    'extract_meta_content'
-                ]
+                detection_results['bypass_recommendations'] = self._default_recommendations()
             
             logger.info(f"Paywall detection - Confidence: {detection_results['confidence']:.2f}, "
                        f"Indicators: {len(detection_results['indicators'])}")
             
+            self.verdict_cache.store(url, detection_results)
             return detection_results
             
         except Exception as e:
             logger.error(f"Paywall detection failed: {e}")
             return detection_results
     
+    def _default_recommendations(self):
+        return [
+            'try_archive_services',
+            'rotate_user_agent',
+            'clear_cookies',
+            'try_rss_feed',
+            'extract_meta_content'
+        ]
+    
+    def _results_from_cache(self, cached):
+        """Build detection results from a cached verdict"""
+        detection_results = {
+            'has_paywall': cached['has_paywall'],
+            'confidence': cached['confidence'],
+            'indicators': [f"Cache: {cached['source']} verdict"],
+            'bypass_recommendations': [],
+            'cached': cached['source']
+        }
+        
+        if cached['has_paywall']:
+            recommendations = self._default_recommendations()
+            # Jump straight to the strategy that worked last time
+            for recommendation, method in BYPASS_METHODS.items():
+                if method == cached.get('bypass_method'):
+                    recommendations.remove(recommendation)
+                    recommendations.insert(0, recommendation)
+            detection_results['bypass_recommendations'] = recommendations
+        
+        return detection_results
+    
     def bypass_paywall(self, driver, url, detection_results):
         """Attempt various paywall bypass methods"""
         bypass_results = {
@@ -149,54 +359,36 @@ class PaywallDetector:
             bypass_results['method_used'] = 'no_paywall_detected'
             return bypass_results
         
-        # Method 1: Archive services
-        if 'try_archive_services' in detection_results['bypass_recommendations']:
-            content = self._try_archive_services(url)
-            if content:
-                bypass_results['success'] = True
-                bypass_results['method_used'] = 'archive_service'
-                bypass_results['content'] = content
-                return bypass_results
-            bypass_results['attempts'].append('archive_services_failed')
-        
-        # Method 2: User agent rotation
-        if 'rotate_user_agent' in detection_results['bypass_recommendations']:
-            success = self._rotate_user_agent(driver)
-            if success:
-                time.sleep(3)
-                content = self._extract_content_after_bypass(driver)
-                if content:
-                    bypass_results['success'] = True
-                    bypass_results['method_used'] = 'user_agent_rotation'
-                    bypass_results['content'] = content
-                    return bypass_results
-            bypass_results['attempts'].append('user_agent_rotation_failed')
-        
-        # Method 3: RSS feed extraction
-        if 'try_rss_feed' in detection_results['bypass_recommendations']:
-            content = self._try_rss_extraction(url)
-            if content:
-                bypass_results['success'] = True
-                bypass_results['method_used'] = 'rss_feed'
-                bypass_results['content'] = content
-                return bypass_results
-            bypass_results['attempts'].append('rss_extraction_failed')
+        strategies = {
+            'try_archive_services': (lambda: self._try_archive_services(url), 'archive_services_failed'),
+            'rotate_user_agent': (lambda: self._try_user_agent_variants(url), 'user_agent_rotation_failed'),
+            'try_rss_feed': (lambda: self._try_rss_extraction(url), 'rss_extraction_failed'),
+            'extract_meta_content': (lambda: self._extract_meta_content(driver), 'meta_extraction_failed')
+        }
         
-        # Method 4: Meta content extraction
-        if 'extract_meta_content' in detection_results['bypass_recommendations']:
-            content = self._extract_meta_content(driver)
+        # Recommendations are tried in order, so a cached verdict can put the
+        # previously successful strategy first
+        for recommendation in detection_results['bypass_recommendations']:
+            if recommendation not in strategies:
+                continue
+            attempt, failure_name = strategies[recommendation]
+            with tracer.span("paywall.bypass", strategy=recommendation):
+                content = attempt()
             if content:
                 bypass_results['success'] = True
-                bypass_results['method_used'] = 'meta_extraction'
+                bypass_results['method_used'] = BYPASS_METHODS[recommendation]
                 bypass_results['content'] = content
+                self.verdict_cache.record_bypass(url, bypass_results['method_used'])
                 return bypass_results
-            bypass_results['attempts'].append('meta_extraction_failed')
+            bypass_results['attempts'].append(failure_name)
         
         logger.warning(f"All bypass methods failed for {url}")
         return bypass_results
     
     def _try_archive_services(self, url):
         """Try to get content from archive services"""
+        import requests
+        
         archive_urls = [
             f"https://web.archive.org/web/{url}",
             f"https://archive.today/{url}",
@@ -214,23 +406,60 @@ class PaywallDetector:
                 continue
         return None
     
-    def _rotate_user_agent(self, driver):
-        """Rotate user agent and refresh page"""
+    def _http_session(self):
+        """Shared HTTP session so user-agent variants reuse pooled connections"""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4,
+                                  pool_maxsize=len(self.user_agents))
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self._session = session
+        return self._session
+    
+    def _fetch_with_user_agent(self, url, user_agent):
+        """Fetch a page over HTTP with one user agent profile"""
+        response = self._http_session().get(url, timeout=15, headers={
+            'User-Agent': user_agent,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8'
+        })
+        if response.status_code != 200:
+            return None
+        return self._extract_content_from_html(response.text)
+    
+    def _try_user_agent_variants(self, url):
+        """Fetch the page with every user agent profile concurrently
+        
+        Extraction runs on whichever response comes back with content first,
+        so the browser session is never reloaded or left with a UA override.
+        """
+        executor = ThreadPoolExecutor(max_workers=len(self.user_agents))
+        futures = {executor.submit(self._fetch_with_user_agent, url, user_agent): user_agent
+                   for user_agent in self.user_agents}
         try:
-            # This requires restarting the driver with new user agent
-            # For now, we'll use CDP commands if available
-            new_user_agent = random.choice(self.user_agents)
-            driver.execute_cdp_cmd('Network.setUserAgentOverride', {"userAgent": new_user_agent})
-            driver.refresh()
-            time.sleep(3)
-            logger.info(f"User agent rotated to: {new_user_agent[:50]}...")
-            return True
-        except Exception as e:
-            logger.warning(f"User agent rotation failed: {e}")
-            return False
+            for future in as_completed(futures):
+                try:
+                    content = future.result()
+                except Exception as e:
+                    logger.debug(f"User agent variant failed: {e}")
+                    continue
+                if content:
+                    logger.info(f"Content fetched with user agent: {futures[future][:50]}...")
+                    return content
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        logger.warning(f"No user agent variant returned content for {url}")
+        return None
     
     def _try_rss_extraction(self, url):
         """Try to extract content from RSS feeds"""
+        import requests
+        
         # Common RSS endpoints for El País
         rss_endpoints = [
             'https://feeds.elpais.com/mrss-s/pages/ep/site/elpais.com/portada',
@@ -319,27 +548,21 @@ class PaywallDetector:
         
         return None
     
-    def _extract_content_after_bypass(self, driver):
-        """Extract content after attempting bypass"""
-        content_selectors = [
-            '.a_c p', '.articulo-cuerpo p', '.article-body p',
-            '.story-body p', 'article p', '.content p',
-            '.post-content p', '.entry-content p'
-        ]
+    def _extract_content_from_html(self, html):
+        """Extract content from raw HTML fetched outside the browser"""
+        from bs4 import BeautifulSoup
         
-        for selector in content_selectors:
-            try:
-                paragraphs = driver.find_elements(By.CSS_SELECTOR, selector)
-                if len(paragraphs) >= 2:
-                    content_parts = []
-                    for p in paragraphs[:6]:
-                        text = p.text.strip()
-                        if len(text) > 30:
-                            content_parts.append(text)
-                    
-                    if content_parts:
-                        return " ".join(content_parts)
-            except:
-                continue
+        soup = BeautifulSoup(html, 'lxml')
+        for selector in self.bypass_content_selectors:
+            paragraphs = soup.select(selector)
+            if len(paragraphs) >= 2:
+                content_parts = []
+                for p in paragraphs[:6]:
+                    text = p.get_text(" ", strip=True)
+                    if len(text) > 30:
+                        content_parts.append(text)
+                
+                if content_parts:
+                    return " ".join(content_parts)
         
         return None
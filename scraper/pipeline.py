@@ -0,0 +1,203 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+class Stage:
+    """One pipeline step with its own worker threads
+
+    func is called with each item and returns the item for the next stage,
+    or None to drop it. If setup is given, every worker calls it once and
+    func receives the result as a second argument (e.g. a WebDriver per
+    fetch worker); teardown is called with it when the worker exits.
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=None, setup=None, teardown=None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.setup = setup
+        self.teardown = teardown
+        self.metrics = StageMetrics(name, self.workers)
+
+class StageMetrics:
+    """Per-stage counters, busy time and queue depth samples"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+        self.queue_depth_total = 0
+        self.queue_depth_samples = 0
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def sample_queue(self, depth):
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self.queue_depth_total += depth
+            self.queue_depth_samples += 1
+
+    def record(self, seconds, outcome):
+        with self._lock:
+            self.busy_seconds += seconds
+            if outcome == 'processed':
+                self.processed += 1
+            elif outcome == 'dropped':
+                self.dropped += 1
+            else:
+                self.errors += 1
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = (self.finished_at or time.monotonic()) - self.started_at if self.started_at else 0.0
+            handled = self.processed + self.dropped + self.errors
+            return {
+                "workers": self.workers,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "items_per_second": round(handled / elapsed, 3) if elapsed else 0.0,
+                "busy_seconds": round(self.busy_seconds, 3),
+                "utilization": round(self.busy_seconds / (elapsed * self.workers), 3) if elapsed else 0.0,
+                "max_queue_depth": self.max_queue_depth,
+                "mean_queue_depth": round(self.queue_depth_total / self.queue_depth_samples, 2)
+                                    if self.queue_depth_samples else 0.0
+            }
+
+class Pipeline:
+    """Stages connected by bounded queues
+
+    The source iterable feeds the first stage. Each queue holds at most
+    queue_size items, so a slow stage blocks the ones upstream of it
+    instead of letting work pile up in memory. Stages shut down in order
+    once the source is exhausted and every upstream worker has finished.
+
+        pipeline = Pipeline([Stage("fetch", fetch, workers=2), Stage("sink", write)])
+        metrics = pipeline.run(links)
+    """
+
+    def __init__(self, stages, queue_size=8):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=stage.queue_size or queue_size) for stage in stages]
+        self._remaining = [stage.workers for stage in stages]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.source_items = 0
+
+    def _put(self, index, item):
+        """Blocking put that gives up if the pipeline is being stopped"""
+        while not self._stop.is_set():
+            try:
+                self.queues[index].put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed(self, source):
+        try:
+            for item in source:
+                if not self._put(0, item):
+                    break
+                self.source_items += 1
+        except Exception as e:
+            logger.error(f"Pipeline source failed: {e}", exc_info=True)
+        finally:
+            for _ in range(self.stages[0].workers):
+                self.queues[0].put(_DONE)
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        is_last = index == len(self.stages) - 1
+        state = None
+        try:
+            if stage.setup:
+                state = stage.setup()
+            while True:
+                item = self.queues[index].get()
+                if item is _DONE:
+                    break
+                stage.metrics.sample_queue(self.queues[index].qsize())
+                if self._stop.is_set():
+                    continue
+
+                started = time.monotonic()
+                try:
+                    result = stage.func(item, state) if stage.setup else stage.func(item)
+                except Exception as e:
+                    stage.metrics.record(time.monotonic() - started, 'error')
+                    logger.error(f"Stage {stage.name} failed on item: {e}", exc_info=True)
+                    continue
+                stage.metrics.record(time.monotonic() - started, 'dropped' if result is None else 'processed')
+
+                if result is not None and not is_last:
+                    self._put(index + 1, result)
+        except Exception as e:
+            logger.error(f"Stage {stage.name} worker crashed: {e}", exc_info=True)
+            self._stop.set()
+            # Drain so the feeder and upstream workers are never left blocked
+            while self.queues[index].get() is not _DONE:
+                pass
+        finally:
+            if stage.teardown and state is not None:
+                try:
+                    stage.teardown(state)
+                except Exception as e:
+                    logger.warning(f"Stage {stage.name} teardown failed: {e}")
+            with self._lock:
+                self._remaining[index] -= 1
+                last_worker = self._remaining[index] == 0
+            if last_worker:
+                stage.metrics.finished_at = time.monotonic()
+                if not is_last:
+                    for _ in range(self.stages[index + 1].workers):
+                        self.queues[index + 1].put(_DONE)
+
+    def run(self, source):
+        """Push every source item through the stages and block until done"""
+        threads = []
+        now = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            stage.metrics.started_at = now
+            for n in range(stage.workers):
+                thread = threading.Thread(target=self._worker, args=(index,),
+                                          name=f"{stage.name}-{n}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        feeder = threading.Thread(target=self._feed, args=(source,), name="pipeline-source", daemon=True)
+        feeder.start()
+        try:
+            feeder.join()
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self._stop.set()
+            raise
+        return self.metrics()
+
+    def stop(self):
+        """Ask the workers to skip remaining items and finish"""
+        self._stop.set()
+
+    def metrics(self):
+        return {stage.name: stage.metrics.snapshot() for stage in self.stages}
+
+    def log_metrics(self):
+        for name, stats in self.metrics().items():
+            logger.info(f"Stage {name}: {stats['processed']} processed, {stats['dropped']} dropped, "
+                        f"{stats['errors']} errors, {stats['items_per_second']} items/s, "
+                        f"utilization {stats['utilization']:.0%}, max queue {stats['max_queue_depth']}")
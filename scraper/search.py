@@ -0,0 +1,389 @@
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from .analyse import tokenize
+from .store import ArticleStore, FAILED_CONTENT
+
+logger = logging.getLogger(__name__)
+
+def encode_varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def decode_varints(blob):
+    value = shift = 0
+    for byte in blob:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            yield value
+            value = shift = 0
+
+def encode_posting(doc_delta, title_tf, positions):
+    """doc id delta, title term frequency, position count, then position deltas, all varints"""
+    out = bytearray()
+    encode_varint(doc_delta, out)
+    encode_varint(title_tf, out)
+    encode_varint(len(positions), out)
+    previous = 0
+    for position in positions:
+        encode_varint(position - previous, out)
+        previous = position
+    return bytes(out)
+
+def decode_postings(blob):
+    """Yield (doc_id, title_tf, positions) from a posting list blob"""
+    values = decode_varints(blob)
+    doc_id = 0
+    for doc_delta in values:
+        doc_id += doc_delta
+        title_tf = next(values)
+        positions = []
+        position = 0
+        for _ in range(next(values)):
+            position += next(values)
+            positions.append(position)
+        yield doc_id, title_tf, positions
+
+class SearchIndex:
+    """On-disk inverted index over article titles and content
+
+    Uses the same tokenization as the word-frequency analysis. A term's
+    posting list is stored as blobs of delta- and varint-encoded doc ids and
+    positions, split into blocks of about block_size bytes that each start
+    from an absolute doc id. New documents get increasing ids, so adding an
+    article only appends to the last block of each of its terms. Re-adding
+    a URL tombstones the old document and takes it out of its terms'
+    document frequencies; compact() rewrites the postings without
+    tombstoned documents. Queries evaluate the rarest clause first and only
+    decode the blocks of later terms that can hold a remaining candidate.
+    Title and content form one position stream with a gap in between, so
+    phrases never span the two fields. Ranking is BM25 with title matches
+    weighted by title_weight.
+
+        index = SearchIndex()
+        index.add_article(article)
+        index.search('"cambio climático" europa -guerra')
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS docs (
+            doc_id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            title TEXT,
+            length INTEGER NOT NULL,
+            title_length INTEGER NOT NULL,
+            deleted INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_docs_url ON docs(url);
+        CREATE TABLE IF NOT EXISTS doc_terms (
+            doc_id INTEGER PRIMARY KEY,
+            terms TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS terms (
+            term TEXT PRIMARY KEY,
+            df INTEGER NOT NULL,
+            last_doc INTEGER NOT NULL,
+            blocks INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS postings (
+            term TEXT NOT NULL,
+            block INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (term, block)
+        ) WITHOUT ROWID;
+    """
+
+    QUERY_TOKEN = re.compile(r'(-?)"([^"]*)"|(\S+)')
+
+    def __init__(self, db_path="data/search.sqlite3", title_weight=2.0, k1=1.2, b=0.75, block_size=4096):
+        self.db_path = db_path
+        self.block_size = block_size
+        self.title_weight = title_weight
+        self.k1 = k1
+        self.b = b
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _term_positions(title, content):
+        title_tokens = tokenize(title or "")
+        content_tokens = tokenize(content or "")
+        positions = defaultdict(list)
+        for position, token in enumerate(title_tokens):
+            positions[token].append(position)
+        offset = len(title_tokens) + 1
+        for position, token in enumerate(content_tokens):
+            positions[token].append(offset + position)
+        return positions, len(title_tokens), len(title_tokens) + len(content_tokens)
+
+    def add_article(self, article):
+        """Index one article; an earlier version with the same URL is replaced"""
+        url = article.get('url')
+        if not url:
+            return None
+        url = ArticleStore.canonical_url(url)
+        content = article.get('content')
+        if content == FAILED_CONTENT:
+            content = None
+        positions, title_length, length = self._term_positions(article.get('title'), content)
+
+        with self._lock, self._conn:
+            replaced = self._conn.execute(
+                "SELECT d.doc_id, t.terms FROM docs d LEFT JOIN doc_terms t ON t.doc_id = d.doc_id "
+                "WHERE d.url = ? AND d.deleted = 0", (url,)).fetchall()
+            for old_doc, old_terms in replaced:
+                self._conn.execute("UPDATE docs SET deleted = 1 WHERE doc_id = ?", (old_doc,))
+                self._conn.execute("DELETE FROM doc_terms WHERE doc_id = ?", (old_doc,))
+                if old_terms:
+                    self._conn.executemany("UPDATE terms SET df = df - 1 WHERE term = ?",
+                                           [(term,) for term in old_terms.split()])
+            doc_id = self._conn.execute(
+                "INSERT INTO docs (url, title, length, title_length) VALUES (?, ?, ?, ?)",
+                (url, article.get('title'), length, title_length)
+            ).lastrowid
+            self._conn.execute("INSERT INTO doc_terms (doc_id, terms) VALUES (?, ?)",
+                               (doc_id, " ".join(positions)))
+            for term, term_positions in positions.items():
+                title_tf = sum(1 for p in term_positions if p < title_length)
+                self._append_posting(term, doc_id, title_tf, term_positions)
+        return doc_id
+
+    def _append_posting(self, term, doc_id, title_tf, positions):
+        row = self._conn.execute("SELECT last_doc, blocks FROM terms WHERE term = ?", (term,)).fetchone()
+        if row is None:
+            self._conn.execute("INSERT INTO terms (term, df, last_doc, blocks) VALUES (?, 1, ?, 1)", (term, doc_id))
+            self._conn.execute("INSERT INTO postings (term, block, data) VALUES (?, 0, ?)",
+                               (term, encode_posting(doc_id, title_tf, positions)))
+            return
+
+        last_doc, blocks = row
+        data = self._conn.execute("SELECT data FROM postings WHERE term = ? AND block = ?",
+                                  (term, blocks - 1)).fetchone()[0]
+        if len(data) < self.block_size:
+            self._conn.execute("UPDATE postings SET data = ? WHERE term = ? AND block = ?",
+                               (data + encode_posting(doc_id - last_doc, title_tf, positions), term, blocks - 1))
+        else:
+            self._conn.execute("INSERT INTO postings (term, block, data) VALUES (?, ?, ?)",
+                               (term, blocks, encode_posting(doc_id, title_tf, positions)))
+            blocks += 1
+        self._conn.execute("UPDATE terms SET df = df + 1, last_doc = ?, blocks = ? WHERE term = ?",
+                           (doc_id, blocks, term))
+
+    def add_articles(self, articles):
+        return sum(1 for article in articles if self.add_article(article) is not None)
+
+    def build_from_store(self, store, **filters):
+        """Index every matching article in an ArticleStore"""
+        added = self.add_articles(store.iter_query(**filters))
+        logger.info(f"Indexed {added} articles into {self.db_path}")
+        return added
+
+    def _postings(self, term, docs=None):
+        """({doc_id: (title_tf, positions)}, complete) for a term
+
+        With docs, only the blocks whose doc id range can hold one of them
+        are read and decoded (a block's range runs from its first doc id to
+        the next block's), so the result may miss other documents; complete
+        tells whether every block was read.
+        """
+        with self._lock:
+            if docs is None:
+                blocks = [data for (data,) in self._conn.execute(
+                    "SELECT data FROM postings WHERE term = ? ORDER BY block", (term,))]
+            else:
+                wanted = sorted(docs)
+                heads = self._conn.execute(
+                    "SELECT block, substr(data, 1, 10) FROM postings WHERE term = ? ORDER BY block",
+                    (term,)).fetchall()
+                firsts = [next(decode_varints(head)) for _, head in heads]
+                needed = []
+                for i, (block, _) in enumerate(heads):
+                    start = bisect_left(wanted, firsts[i])
+                    if start < len(wanted) and (i + 1 == len(heads) or wanted[start] < firsts[i + 1]):
+                        needed.append(block)
+                if not needed:
+                    return {}, not heads
+                placeholders = ",".join("?" * len(needed))
+                blocks = [data for (data,) in self._conn.execute(
+                    f"SELECT data FROM postings WHERE term = ? AND block IN ({placeholders}) ORDER BY block",
+                    [term, *needed])]
+        postings = {doc_id: (title_tf, positions)
+                    for data in blocks for doc_id, title_tf, positions in decode_postings(data)}
+        return postings, docs is None or len(needed) == len(heads)
+
+    def _stats(self):
+        with self._lock:
+            count, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length + (? - 1) * title_length), 0) FROM docs WHERE deleted = 0",
+                (self.title_weight,)
+            ).fetchone()
+            deleted = {row[0] for row in self._conn.execute("SELECT doc_id FROM docs WHERE deleted = 1")}
+        return count, (total / count if count else 0.0), deleted
+
+    def _document_frequencies(self, terms):
+        terms = list(terms)
+        with self._lock:
+            placeholders = ",".join("?" * len(terms))
+            return dict(self._conn.execute(f"SELECT term, df FROM terms WHERE term IN ({placeholders})", terms))
+
+    @staticmethod
+    def _phrase_docs(term_postings):
+        """Docs in which the terms occur at consecutive positions"""
+        docs = set.intersection(*(set(postings) for postings in term_postings)) if term_postings else set()
+        matches = set()
+        for doc_id in docs:
+            starts = set(term_postings[0][doc_id][1])
+            for offset, postings in enumerate(term_postings[1:], 1):
+                positions = postings[doc_id][1]
+                starts &= {p - offset for p in positions}
+                if not starts:
+                    break
+            if starts:
+                matches.add(doc_id)
+        return matches
+
+    def parse_query(self, query):
+        """Split a query into OR-groups of (required, excluded) clauses
+
+        A clause is a tuple of terms: one term, or several for a quoted
+        phrase. Terms are ANDed by default, OR separates alternatives and a
+        leading - (or NOT before the clause) excludes it.
+        """
+        groups = [([], [])]
+        negate_next = False
+        for match in self.QUERY_TOKEN.finditer(query):
+            minus, phrase, word = match.groups()
+            if word in ("OR", "AND", "NOT"):
+                if word == "OR":
+                    groups.append(([], []))
+                negate_next = word == "NOT"
+                continue
+            negate = negate_next or bool(minus)
+            if word is not None and word.startswith("-") and len(word) > 1:
+                negate, word = True, word[1:]
+            terms = tuple(tokenize(phrase if phrase is not None else word))
+            negate_next = False
+            if terms:
+                groups[-1][1 if negate else 0].append(terms)
+        return [group for group in groups if group[0]]
+
+    def search(self, query, limit=10):
+        """Boolean/phrase match, ranked by BM25; returns dicts with url, title and score"""
+        groups = self.parse_query(query)
+        if not groups:
+            return []
+
+        count, average_length, deleted = self._stats()
+        terms = {term for required, excluded in groups for clause in required + excluded for term in clause}
+        dfs = self._document_frequencies(terms)
+
+        # Complete decodes are reused for any candidates, partial ones for subsets of theirs
+        decoded, partial = {}, {}
+        def postings(term, candidates=None):
+            if term in decoded:
+                found = decoded[term]
+            elif candidates is not None and term in partial and candidates <= partial[term][0]:
+                found = partial[term][1]
+            else:
+                found, complete = self._postings(term, candidates)
+                if complete:
+                    decoded[term] = found
+                else:
+                    partial[term] = (set(candidates), found)
+            if candidates is None:
+                return found
+            if len(candidates) < len(found):
+                return {doc_id: found[doc_id] for doc_id in candidates if doc_id in found}
+            return {doc_id: posting for doc_id, posting in found.items() if doc_id in candidates}
+
+        def clause_docs(clause, candidates=None):
+            if len(clause) == 1:
+                docs = set(postings(clause[0], candidates))
+            else:
+                docs = self._phrase_docs([postings(term, candidates) for term in clause])
+            return docs - deleted
+
+        matched = set()
+        for required, excluded in groups:
+            # Rarest clause first; later clauses only decode blocks that can hold a candidate
+            docs = None
+            for clause in sorted(required, key=lambda clause: min(dfs.get(term, 0) for term in clause)):
+                docs = clause_docs(clause, docs)
+                if not docs:
+                    break
+            for clause in excluded:
+                if not docs:
+                    break
+                docs -= clause_docs(clause, docs)
+            matched |= docs
+        if not matched:
+            return []
+
+        with self._lock:
+            placeholders = ",".join("?" * len(matched))
+            docs = {row[0]: row[1:] for row in self._conn.execute(
+                f"SELECT doc_id, url, title, length, title_length FROM docs WHERE doc_id IN ({placeholders})",
+                list(matched))}
+
+        scores = dict.fromkeys(matched, 0.0)
+        scoring_terms = {term for required, _ in groups for clause in required for term in clause}
+        for term in scoring_terms:
+            df = dfs.get(term, 0)
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            for doc_id, (title_tf, positions) in postings(term, matched).items():
+                tf = self.title_weight * title_tf + (len(positions) - title_tf)
+                _, _, length, title_length = docs[doc_id]
+                weighted_length = length + (self.title_weight - 1) * title_length
+                norm = self.k1 * (1 - self.b + self.b * weighted_length / (average_length or 1))
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [{"url": docs[doc_id][0], "title": docs[doc_id][1], "score": round(score, 4)}
+                for doc_id, score in ranked]
+
+    def compact(self):
+        """Rewrite posting lists without tombstoned documents"""
+        with self._lock, self._conn:
+            deleted = {row[0] for row in self._conn.execute("SELECT doc_id FROM docs WHERE deleted = 1")}
+            if not deleted:
+                return 0
+            terms = [row[0] for row in self._conn.execute("SELECT term FROM terms")]
+            for term in terms:
+                live = [posting for (data,) in self._conn.execute(
+                            "SELECT data FROM postings WHERE term = ? ORDER BY block", (term,)).fetchall()
+                        for posting in decode_postings(data) if posting[0] not in deleted]
+                self._conn.execute("DELETE FROM postings WHERE term = ?", (term,))
+                if not live:
+                    self._conn.execute("DELETE FROM terms WHERE term = ?", (term,))
+                    continue
+                blocks = [bytearray()]
+                previous = 0
+                for doc_id, title_tf, positions in live:
+                    if len(blocks[-1]) >= self.block_size:
+                        blocks.append(bytearray())
+                        previous = 0
+                    blocks[-1] += encode_posting(doc_id - previous, title_tf, positions)
+                    previous = doc_id
+                self._conn.executemany("INSERT INTO postings (term, block, data) VALUES (?, ?, ?)",
+                                       [(term, n, bytes(block)) for n, block in enumerate(blocks)])
+                self._conn.execute("UPDATE terms SET df = ?, last_doc = ?, blocks = ? WHERE term = ?",
+                                   (len(live), previous, len(blocks), term))
+            self._conn.execute("DELETE FROM docs WHERE deleted = 1")
+        return len(deleted)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,115 @@
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class JsonlSink:
+    """Append-only JSON Lines writer for streaming output
+
+    Each record is written as one compact line as soon as it is available,
+    so memory stays flat and the file can be tailed while a run is going.
+    Output can be gzip- or zstd-compressed; compressed streams are
+    sync-flushed so readers can decode everything written so far. The file
+    is flushed and fsynced every fsync_every records or fsync_interval
+    seconds, whichever comes first.
+    """
+
+    EXTENSIONS = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+    def __init__(self, path, compression=None, fsync_every=50, fsync_interval=5.0):
+        if compression not in self.EXTENSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+
+        extension = self.EXTENSIONS[compression]
+        self.path = path if path.endswith(extension) else path + extension
+        self.compression = compression
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.records_written = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._raw = open(self.path, "ab")
+        self._stream = self._open_stream()
+
+    def _open_stream(self):
+        if self.compression == "gzip":
+            return gzip.GzipFile(fileobj=self._raw, mode="ab")
+        if self.compression == "zstd":
+            try:
+                import zstandard
+            except ImportError:
+                logger.error("zstandard library not installed. Install with: pip install zstandard")
+                self._raw.close()
+                raise
+            self._zstd_flush_block = zstandard.FLUSH_BLOCK
+            return zstandard.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        return self._raw
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._stream.write(line.encode("utf-8"))
+            self.records_written += 1
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_every or
+                    time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync()
+            else:
+                self._flush()
+
+    def _flush(self):
+        if self.compression == "zstd":
+            self._stream.flush(self._zstd_flush_block)
+        else:
+            self._stream.flush()
+        if self._stream is not self._raw:
+            self._raw.flush()
+
+    def _sync(self):
+        self._flush()
+        os.fsync(self._raw.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._raw.closed:
+                return
+            self._sync()
+            if self._stream is not self._raw:
+                self._stream.close()
+            self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_jsonl(path):
+    """Iterate over the records of a possibly compressed JSON Lines file"""
+    if path.endswith(".gz"):
+        f = gzip.open(path, "rt", encoding="utf-8")
+    elif path.endswith(".zst"):
+        import zstandard
+        import io
+        f = io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True),
+                             encoding="utf-8")
+    else:
+        f = open(path, "r", encoding="utf-8")
+
+    with f:
+        try:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        except EOFError:
+            # A compressed file still being written has no end-of-stream marker yet
+            return
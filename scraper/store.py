@@ -0,0 +1,363 @@
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+FAILED_CONTENT = "Content could not be extracted"
+
+def processing_metadata(article):
+    """Per-article processing flags stored with every saved article"""
+    return {
+        "content_extracted": len(article.get('content') or '') > 50 and article.get('content') != FAILED_CONTENT,
+        "image_downloaded": article.get('image') is not None,
+        "paywall_detected": article.get('paywall_detected', False),
+        "paywall_confidence": article.get('paywall_confidence', 0.0),
+        "bypass_method": article.get('bypass_method'),
+        "extraction_method": article.get('extraction_method'),
+        "content_quality_score": article.get('content_score', 0.0)
+    }
+
+class ArticleStore:
+    """SQLite article store with upserts on canonical URL
+
+    Articles, their title and content translations and their processing
+    metadata live in separate tables. Timestamp, section, paywall and
+    extraction method are indexed so archive-wide questions don't need to
+    load every JSON dump. The database runs in WAL mode so readers are not
+    blocked by a crawl that is writing.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL UNIQUE,
+            original_url TEXT,
+            title TEXT,
+            content TEXT,
+            image TEXT,
+            section TEXT,
+            error TEXT,
+            extraction_timestamp TEXT,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS translations (
+            article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+            target TEXT NOT NULL,
+            source TEXT NOT NULL,
+            original_title TEXT,
+            translated_title TEXT,
+            translation_skipped TEXT,
+            PRIMARY KEY (article_id, target)
+        );
+        CREATE TABLE IF NOT EXISTS processing_metadata (
+            article_id INTEGER PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+            content_extracted INTEGER,
+            image_downloaded INTEGER,
+            paywall_detected INTEGER,
+            paywall_confidence REAL,
+            bypass_method TEXT,
+            extraction_method TEXT,
+            content_quality_score REAL
+        );
+        CREATE TABLE IF NOT EXISTS content_translations (
+            article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+            target TEXT NOT NULL,
+            source TEXT NOT NULL,
+            translated_content TEXT NOT NULL,
+            PRIMARY KEY (article_id, target)
+        );
+        CREATE TABLE IF NOT EXISTS article_keywords (
+            article_id INTEGER PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+            keywords TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_articles_timestamp ON articles(extraction_timestamp);
+        CREATE INDEX IF NOT EXISTS idx_articles_section ON articles(section);
+        CREATE INDEX IF NOT EXISTS idx_metadata_paywall ON processing_metadata(paywall_detected);
+        CREATE INDEX IF NOT EXISTS idx_metadata_extraction ON processing_metadata(extraction_method);
+    """
+
+    def __init__(self, db_path="data/articles.sqlite3"):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def canonical_url(url):
+        """Lowercase scheme and host, drop www., query, fragment and trailing slash"""
+        parts = urlsplit(url.strip())
+        host = parts.netloc.lower()
+        if host.startswith("www."):
+            host = host[4:]
+        path = parts.path.rstrip("/") or "/"
+        return urlunsplit((parts.scheme.lower() or "https", host, path, "", ""))
+
+    @staticmethod
+    def section_of(url):
+        segments = [s for s in urlsplit(url).path.split("/") if s]
+        return segments[0].lower() if segments else None
+
+    def _upsert(self, article, translated_title=None, skip_reason=None, source="es", target="en"):
+        url = article.get('url') or ''
+        canonical = self.canonical_url(url)
+        self._conn.execute(
+            """
+            INSERT INTO articles (url, original_url, title, content, image, section, error,
+                                  extraction_timestamp, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                original_url = excluded.original_url,
+                title = excluded.title,
+                content = excluded.content,
+                image = excluded.image,
+                section = excluded.section,
+                error = excluded.error,
+                extraction_timestamp = excluded.extraction_timestamp,
+                updated_at = excluded.updated_at
+            """,
+            (canonical, url, article.get('title'), article.get('content'), article.get('image'),
+             self.section_of(canonical), article.get('error'), article.get('extraction_timestamp'), time.time())
+        )
+        article_id = self._conn.execute("SELECT id FROM articles WHERE url = ?", (canonical,)).fetchone()[0]
+
+        metadata = article.get('processing_metadata') or processing_metadata(article)
+        self._conn.execute(
+            """
+            INSERT OR REPLACE INTO processing_metadata (article_id, content_extracted, image_downloaded,
+                paywall_detected, paywall_confidence, bypass_method, extraction_method, content_quality_score)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (article_id, int(bool(metadata['content_extracted'])), int(bool(metadata['image_downloaded'])),
+             int(bool(metadata['paywall_detected'])), metadata['paywall_confidence'],
+             metadata['bypass_method'], metadata['extraction_method'], metadata['content_quality_score'])
+        )
+
+        if article.get('keywords') is not None:
+            self._conn.execute("INSERT OR REPLACE INTO article_keywords (article_id, keywords) VALUES (?, ?)",
+                               (article_id, json.dumps(article['keywords'], ensure_ascii=False)))
+        else:
+            # The content was replaced, so keywords taken from the old content are stale
+            self._conn.execute("DELETE FROM article_keywords WHERE article_id = ?", (article_id,))
+
+        if article.get('translated_content') is not None:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO content_translations (article_id, target, source, translated_content) "
+                "VALUES (?, ?, ?, ?)", (article_id, target, source, article['translated_content']))
+        else:
+            # Likewise, a body translation of the old content no longer matches
+            self._conn.execute("DELETE FROM content_translations WHERE article_id = ?", (article_id,))
+
+        if translated_title is not None:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO translations (article_id, target, source, original_title,
+                                                     translated_title, translation_skipped)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (article_id, target, source, article.get('title'), translated_title, skip_reason)
+            )
+        return article_id
+
+    def upsert(self, article, translated_title=None, skip_reason=None, source="es", target="en"):
+        """Insert or update one article keyed by its canonical URL"""
+        with self._lock, self._conn:
+            return self._upsert(article, translated_title, skip_reason, source, target)
+
+    def upsert_many(self, records, batch_size=500):
+        """Bulk upsert (article, translated_title, skip_reason) tuples in batched transactions"""
+        written = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                written += self._write_batch(batch)
+                batch = []
+        if batch:
+            written += self._write_batch(batch)
+        return written
+
+    def _write_batch(self, batch):
+        with self._lock, self._conn:
+            for article, translated_title, skip_reason in batch:
+                self._upsert(article, translated_title, skip_reason)
+        return len(batch)
+
+    def upsert_translation(self, url, original_title, translated_title, skip_reason=None, source="es", target="en"):
+        """Store a title translation for an already stored article; False if the URL is unknown"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM articles WHERE url = ?", (self.canonical_url(url),)).fetchone()
+            if row is None:
+                return False
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO translations (article_id, target, source, original_title,
+                                                     translated_title, translation_skipped)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (row[0], target, source, original_title, translated_title, skip_reason)
+            )
+        return True
+
+    def upsert_content_translation(self, url, translated_content, source="es", target="en"):
+        """Store a translation of the content of an already stored article; False if the URL is unknown"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM articles WHERE url = ?", (self.canonical_url(url),)).fetchone()
+            if row is None:
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO content_translations (article_id, target, source, translated_content) "
+                "VALUES (?, ?, ?, ?)", (row[0], target, source, translated_content))
+        return True
+
+    def contains(self, url):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM articles WHERE url = ?",
+                                      (self.canonical_url(url),)).fetchone() is not None
+
+    def upsert_keywords(self, url, keywords):
+        """Store the keywords of an already stored article; False if the URL is unknown"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT id FROM articles WHERE url = ?", (self.canonical_url(url),)).fetchone()
+            if row is None:
+                return False
+            self._conn.execute("INSERT OR REPLACE INTO article_keywords (article_id, keywords) VALUES (?, ?)",
+                               (row[0], json.dumps(keywords, ensure_ascii=False)))
+        return True
+
+    @staticmethod
+    def _row_dict(row):
+        record = dict(row)
+        if record.get('keywords') is not None:
+            record['keywords'] = json.loads(record['keywords'])
+        return record
+
+    def query(self, paywall_detected=None, section=None, extraction_method=None,
+              since=None, until=None, target="en", limit=None, updated_after=None, oldest_first=False):
+        """Articles matching the given filters, newest first (or oldest_first), as flat dicts
+
+        since and until compare against extraction_timestamp (ISO strings or
+        datetimes); updated_after compares against the upsert time (epoch
+        seconds), for incremental exports.
+        """
+        sql, params = self._select(paywall_detected, section, extraction_method, since, until,
+                                   target, limit, updated_after, oldest_first)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_dict(row) for row in rows]
+
+    def iter_query(self, batch_size=1000, **filters):
+        """Like query, but streams rows in batches from a separate read connection
+
+        Memory stays bounded however large the archive is, and WAL mode lets
+        writers carry on while the iteration runs.
+        """
+        sql, params = self._select(**filters)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_dict(row)
+        finally:
+            conn.close()
+
+    def _select(self, paywall_detected=None, section=None, extraction_method=None,
+                since=None, until=None, target="en", limit=None, updated_after=None, oldest_first=False):
+        clauses = []
+        params = [target, target]
+        if paywall_detected is not None:
+            clauses.append("m.paywall_detected = ?")
+            params.append(int(paywall_detected))
+        if section is not None:
+            clauses.append("a.section = ?")
+            params.append(section)
+        if extraction_method is not None:
+            clauses.append("m.extraction_method = ?")
+            params.append(extraction_method)
+        if since is not None:
+            clauses.append("a.extraction_timestamp >= ?")
+            params.append(since.isoformat() if isinstance(since, datetime) else since)
+        if until is not None:
+            clauses.append("a.extraction_timestamp < ?")
+            params.append(until.isoformat() if isinstance(until, datetime) else until)
+        if updated_after is not None:
+            clauses.append("a.updated_at > ?")
+            params.append(updated_after)
+
+        sql = """
+            SELECT a.*, m.content_extracted, m.image_downloaded, m.paywall_detected, m.paywall_confidence,
+                   m.bypass_method, m.extraction_method, m.content_quality_score,
+                   t.translated_title, t.translation_skipped, k.keywords, c.translated_content
+            FROM articles a
+            LEFT JOIN processing_metadata m ON m.article_id = a.id
+            LEFT JOIN article_keywords k ON k.article_id = a.id
+            LEFT JOIN translations t ON t.article_id = a.id AND t.target = ?
+            LEFT JOIN content_translations c ON c.article_id = a.id AND c.target = ?
+        """
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY a.extraction_timestamp " + ("ASC" if oldest_first else "DESC")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    def iter_titles(self, translated=True, target="en", **filters):
+        """Titles (translated where available) for the analytics"""
+        for row in self.iter_query(target=target, **filters):
+            if translated and row['translated_title']:
+                yield row['translated_title']
+            elif row['title']:
+                yield row['title']
+
+    def iter_texts(self, fields=("title",), translated=True, target="en", **filters):
+        """Title and/or content of each matching article, streamed"""
+        for row in self.iter_query(target=target, **filters):
+            for field in fields:
+                text = row['translated_title'] if field == "title" and translated and row['translated_title'] \
+                    else row.get(field)
+                if text:
+                    yield text
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def import_json_archive(self, pattern="data/elpais_*articles_*.json*"):
+        """Backfill the store from existing article dumps (.json, .jsonl, compressed JSON Lines)"""
+        from .sink import read_jsonl
+
+        def records():
+            for path in sorted(glob.glob(pattern)):
+                if path.endswith(".json"):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        articles = json.load(f)
+                else:
+                    articles = read_jsonl(path)
+                for article in articles:
+                    if article.get('url'):
+                        yield article, article.get('translated_title'), article.get('translation_skipped')
+
+        written = self.upsert_many(records())
+        logger.info(f"Imported {written} articles into {self.db_path}")
+        return written
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,158 @@
+import logging
+import math
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+class Histogram:
+    """Latency histogram with cumulative buckets and a bounded sample for quantiles
+
+    Buckets follow the Prometheus layout (seconds, upper bounds). The
+    quantiles come from a reservoir of at most max_samples observations,
+    which are exact until the reservoir fills up.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, max_samples=4096):
+        self.max_samples = max_samples
+        self.bucket_counts = [0] * len(self.BUCKETS)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._samples = []
+        self._random = random.Random(0)
+
+    def observe(self, seconds, error=False):
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        if len(self._samples) < self.max_samples:
+            self._samples.append(seconds)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < self.max_samples:
+                self._samples[slot] = seconds
+
+    def quantile(self, q):
+        """Nearest-rank quantile of the sampled observations"""
+        if not self._samples:
+            return 0.0
+        ordered = sorted(self._samples)
+        return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": round(self.total, 4),
+            "mean_seconds": round(self.total / self.count, 4) if self.count else 0.0,
+            "p50_seconds": round(self.quantile(0.50), 4),
+            "p95_seconds": round(self.quantile(0.95), 4),
+            "p99_seconds": round(self.quantile(0.99), 4),
+            "max_seconds": round(self.max, 4),
+        }
+
+class Tracer:
+    """Named timing spans aggregated into per-span histograms
+
+    A span is identified by its name plus optional labels, e.g.
+    span("paywall.bypass", strategy="try_rss_feed"). Spans can be used from
+    any thread; an exception inside a span is recorded as an error and
+    re-raised.
+
+        with tracer.span("driver.get"):
+            driver.get(url)
+    """
+
+    METRIC = "scraper_span_duration_seconds"
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, error=False, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds, error)
+
+    @contextmanager
+    def span(self, name, **labels):
+        started = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, error, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    @staticmethod
+    def _span_id(name, labels):
+        return name + "".join(f"[{key}={value}]" for key, value in labels)
+
+    def snapshot(self):
+        """{span id: count, errors, total/mean/p50/p95/p99/max seconds}, slowest total first"""
+        with self._lock:
+            stats = {self._span_id(name, labels): histogram.snapshot()
+                     for (name, labels), histogram in self._histograms.items()}
+        return dict(sorted(stats.items(), key=lambda item: item[1]["total_seconds"], reverse=True))
+
+    @staticmethod
+    def _labels(name, labels, **extra):
+        pairs = [("span", name), *labels, *extra.items()]
+        escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+        return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+    def to_prometheus(self):
+        """Prometheus text exposition: a histogram, plus a summary with the sampled quantiles"""
+        lines = [f"# HELP {self.METRIC} Time spent in instrumented scraper stages",
+                 f"# TYPE {self.METRIC} histogram"]
+        summary = [f"# HELP {self.METRIC}_quantiles Sampled latency quantiles of instrumented scraper stages",
+                   f"# TYPE {self.METRIC}_quantiles summary"]
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(Histogram.BUCKETS, histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f"{self.METRIC}_bucket{self._labels(name, labels, le=bound)} {cumulative}")
+                lines.append(f"{self.METRIC}_bucket{self._labels(name, labels, le='+Inf')} {histogram.count}")
+                lines.append(f"{self.METRIC}_sum{self._labels(name, labels)} {histogram.total:.6f}")
+                lines.append(f"{self.METRIC}_count{self._labels(name, labels)} {histogram.count}")
+                for q in self.QUANTILES:
+                    summary.append(f"{self.METRIC}_quantiles{self._labels(name, labels, quantile=q)} "
+                                   f"{histogram.quantile(q):.6f}")
+                summary.append(f"{self.METRIC}_quantiles_sum{self._labels(name, labels)} {histogram.total:.6f}")
+                summary.append(f"{self.METRIC}_quantiles_count{self._labels(name, labels)} {histogram.count}")
+        return "\n".join(lines + summary) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the text exposition atomically, e.g. for a node_exporter textfile collector"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+        return path
+
+# Process-wide tracer the scraper modules record into
+tracer = Tracer()
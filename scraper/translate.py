@@ -1,190 +1,961 @@
 # scraper/translate.py (fixed version with working APIs)
-import requests
 import time
 import logging
-from typing import Optional, List
+from typing import Callable, Optional, List, Tuple
 import json
+import os
+import sqlite3
+import threading
+import unicodedata
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed
+from .config import (TRANSLATION_PROVIDER_LIMITS, TRANSLATION_PACK_LIMITS, PHRASE_TABLE_PATHS,
+                     TRANSLATION_API_URL, MYMEMORY_API_URL)
+from .tracing import tracer
+from .analyse import STOPWORDS, stopwords_for
 
 logger = logging.getLogger(__name__)
 
+class TokenBucket:
+    """Thread-safe token bucket refilled at a fixed rate"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class ProviderLimiter:
+    """Rate and concurrency limit for a single translation provider"""
+    
+    def __init__(self, rate: float, burst: float, concurrency: int):
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.concurrency = concurrency
+    
+    @contextmanager
+    def slot(self):
+        with self.slots:
+            self.bucket.acquire()
+            yield
+
+class PhraseTableTranslator:
+    """Offline translator doing greedy longest-phrase matching over a phrase table
+    
+    The table is a tab-separated file of source and target phrases loaded
+    into a token trie. Matching is case-insensitive. Casing of the first
+    matched source word (Title or UPPER) is carried over to the output, and
+    punctuation and whitespace pass through untouched.
+    """
+    
+    _END = object()
+    _TOKEN_RE = re.compile(r"\w+|[^\w\s]+|\s+")
+    _loaded = {}
+    _loaded_lock = threading.Lock()
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.trie = {}
+        self.max_phrase_tokens = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                source, target = line.rstrip("\n").split("\t", 1)
+                tokens = source.lower().split()
+                node = self.trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node[self._END] = target
+                self.max_phrase_tokens = max(self.max_phrase_tokens, len(tokens))
+    
+    @classmethod
+    def for_pair(cls, source: str, target: str) -> Optional["PhraseTableTranslator"]:
+        """Return the shared translator for a language pair, loading it once"""
+        path = PHRASE_TABLE_PATHS.get((source, target))
+        if path is None:
+            return None
+        with cls._loaded_lock:
+            if path not in cls._loaded:
+                cls._loaded[path] = cls(path)
+            return cls._loaded[path]
+    
+    @staticmethod
+    def _match_case(source_word: str, target: str) -> str:
+        if len(source_word) > 1 and source_word.isupper():
+            return target.upper()
+        if source_word[:1].isupper():
+            return target[:1].upper() + target[1:]
+        return target
+    
+    def translate(self, text: str) -> str:
+        tokens = self._TOKEN_RE.findall(text)
+        # Indices of word tokens; phrases may span the whitespace between them
+        words = [i for i, token in enumerate(tokens) if token[0].isalnum() or token[0] == "_"]
+        lowered = [tokens[i].lower() for i in words]
+        trie = self.trie
+        end = self._END
+        
+        output = []
+        cursor = 0  # next token index not yet emitted
+        w = 0
+        while w < len(words):
+            node = trie
+            match_target = None
+            match_length = 0
+            k = w
+            while k < len(words) and lowered[k] in node:
+                # A phrase can only continue across a single whitespace token
+                if k > w and words[k] != words[k - 1] + 2:
+                    break
+                node = node[lowered[k]]
+                k += 1
+                if end in node:
+                    match_target = node[end]
+                    match_length = k - w
+            
+            if match_target is None:
+                w += 1
+                continue
+            
+            first = words[w]
+            last = words[w + match_length - 1]
+            output.extend(tokens[cursor:first])
+            output.append(self._match_case(tokens[first], match_target))
+            cursor = last + 1
+            w += match_length
+        
+        output.extend(tokens[cursor:])
+        return "".join(output)
+
+class ProviderHealth:
+    """Rolling success rate, latency and circuit state for one provider"""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.state = self.CLOSED
+        self.success_rate = 1.0
+        self.avg_latency = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+    
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state,
+            "success_rate": round(self.success_rate, 3),
+            "avg_latency": round(self.avg_latency, 3),
+            "successes": self.successes,
+            "failures": self.failures
+        }
+
+class ProviderRouter:
+    """Route translation work to the healthiest provider with per-provider circuit breakers
+    
+    A provider's circuit opens after failure_threshold consecutive failures.
+    After cooldown seconds a single probe request is let through; success
+    closes the circuit again, failure re-opens it.
+    """
+    
+    def __init__(self, providers: List[str], failure_threshold: int = 3, cooldown: float = 60.0,
+                 slow_latency: float = 5.0, smoothing: float = 0.2):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.slow_latency = slow_latency
+        self.smoothing = smoothing
+        self.health = {name: ProviderHealth(name) for name in providers}
+        self._lock = threading.Lock()
+    
+    def route(self, chain: List[str]) -> List[str]:
+        """Return the providers from chain that may be called now, healthiest first"""
+        now = time.monotonic()
+        candidates = []
+        with self._lock:
+            for index, name in enumerate(chain):
+                health = self.health[name]
+                if health.state == ProviderHealth.OPEN:
+                    if now - health.opened_at < self.cooldown:
+                        continue
+                    health.state = ProviderHealth.HALF_OPEN
+                if health.state == ProviderHealth.HALF_OPEN:
+                    if health.probe_in_flight:
+                        continue
+                    health.probe_in_flight = True
+                    candidates.append((2, index, name))
+                    continue
+                degraded = health.success_rate < 0.5 or health.avg_latency > self.slow_latency
+                candidates.append((1 if degraded else 0, index, name))
+        return [name for _, _, name in sorted(candidates)]
+    
+    def release(self, providers: List[str]):
+        """Give back probe slots for routed providers that were never called"""
+        with self._lock:
+            for name in providers:
+                self.health[name].probe_in_flight = False
+    
+    def record_success(self, name: str, latency: float):
+        with self._lock:
+            health = self.health[name]
+            health.successes += 1
+            health.consecutive_failures = 0
+            health.success_rate += self.smoothing * (1.0 - health.success_rate)
+            health.avg_latency += self.smoothing * (latency - health.avg_latency)
+            health.probe_in_flight = False
+            if health.state != ProviderHealth.CLOSED:
+                logger.info(f"Translation provider {name} recovered, closing circuit")
+            health.state = ProviderHealth.CLOSED
+    
+    def record_failure(self, name: str, latency: float):
+        with self._lock:
+            health = self.health[name]
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.success_rate -= self.smoothing * health.success_rate
+            health.avg_latency += self.smoothing * (latency - health.avg_latency)
+            health.probe_in_flight = False
+            if (health.state == ProviderHealth.HALF_OPEN or
+                    health.consecutive_failures >= self.failure_threshold):
+                if health.state != ProviderHealth.OPEN:
+                    logger.warning(f"Translation provider {name} failing, opening circuit "
+                                  f"for {self.cooldown:.0f}s")
+                health.state = ProviderHealth.OPEN
+                health.opened_at = time.monotonic()
+    
+    def all_open(self, chain: List[str]) -> bool:
+        """True when no provider in chain can currently be called"""
+        now = time.monotonic()
+        with self._lock:
+            return all(self.health[name].state == ProviderHealth.OPEN and
+                       now - self.health[name].opened_at < self.cooldown
+                       for name in chain)
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: health.snapshot() for name, health in self.health.items()}
+
+class TranslationCache:
+    """Persistent translation memory with an in-memory LRU in front of SQLite"""
+    
+    def __init__(self, db_path: str = "data/cache/translations.sqlite3", max_memory_entries: int = 4096):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                text TEXT NOT NULL,
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (text, source, target, provider)
+            )
+        """)
+        self._conn.commit()
+    
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Normalize unicode form and whitespace so trivial variants share an entry"""
+        return " ".join(unicodedata.normalize("NFC", text).split())
+    
+    def get(self, text: str, source: str, target: str, providers) -> Optional[str]:
+        """Cached translation from the first of providers (a name or a list, in order) that has one"""
+        providers = [providers] if isinstance(providers, str) else list(providers)
+        normalized = self.normalize(text)
+        with self._lock:
+            for provider in providers:
+                key = (normalized, source, target, provider)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    return self._memory[key]
+            
+            placeholders = ",".join("?" * len(providers))
+            rows = dict(self._conn.execute(
+                "SELECT provider, translation FROM translations "
+                f"WHERE text = ? AND source = ? AND target = ? AND provider IN ({placeholders})",
+                (normalized, source, target, *providers)
+            ).fetchall())
+            for provider in providers:
+                if provider in rows:
+                    self._remember((normalized, source, target, provider), rows[provider])
+                    return rows[provider]
+            return None
+    
+    def put(self, text: str, source: str, target: str, provider: str, translation: str):
+        key = (self.normalize(text), source, target, provider)
+        with self._lock:
+            self._remember(key, translation)
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO translations "
+                    "(text, source, target, provider, translation, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    key + (translation, time.time())
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not persist translation to cache: {e}")
+    
+    def _remember(self, key, translation):
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
 class TranslationService:
     """Enhanced translation service with working APIs and proper fallbacks"""
     
-    def __init__(self, service="mymemory", api_key=None):
+    # Provider order used when the configured service fails, mirroring the
+    # single-text fallback chain
+    FALLBACK_CHAINS = {
+        "mymemory": ["mymemory", "googletrans", "libre_fixed"],
+        "googletrans": ["googletrans", "libre_fixed"],
+        "libre_fixed": ["libre_fixed"],
+    }
+    # Every selectable service: the remote chains plus the offline phrase table
+    SERVICES = [*FALLBACK_CHAINS, "translate_shell"]
+    # Language detection confidence needed to act on a detected language, and
+    # the most words a run of names may have to be left untranslated
+    LANGUAGE_CONFIDENCE = 0.9
+    MAX_NAME_WORDS = 4
+    
+    def __init__(self, service="mymemory", api_key=None, cache: Optional[TranslationCache] = None,
+                 use_cache: bool = True, endpoints: Optional[dict] = None,
+                 provider_limits: Optional[dict] = None, providers: Optional[List[str]] = None,
+                 workers: Optional[int] = None):
+        """endpoints and provider_limits override the config per provider (e.g. to
+        point at a local mock server); providers restricts the fallback chains.
+        workers sizes the pools of translate_batch and submit; by default it
+        is the largest per-provider concurrency."""
         self.service = service
         self.api_key = api_key
         self.request_count = 0
-        self.last_request_time = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache = cache if cache is not None or not use_cache else TranslationCache()
+        self.endpoints = {"mymemory": MYMEMORY_API_URL, "libre_fixed": TRANSLATION_API_URL}
+        self.endpoints.update(endpoints or {})
+        self.providers = providers
+        self.workers = workers
+        limits = dict(TRANSLATION_PROVIDER_LIMITS, **(provider_limits or {}))
+        self.limiters = {name: ProviderLimiter(**provider_limit)
+                         for name, provider_limit in limits.items()}
+        self.router = ProviderRouter(list(TRANSLATION_PROVIDER_LIMITS))
+        self._googletrans_translator = None
+        self._language_identifier = None
+        self.skip_language_check = False
+        self.skipped_translations = {}
+        self.skip_count = 0
+        self._executor = None
+        self._stats_lock = threading.Lock()
+    
+    @contextmanager
+    def _provider_slot(self, provider: str):
+        """Wait for the provider's rate limit and count the request"""
+        with self.limiters[provider].slot():
+            with self._stats_lock:
+                self.request_count += 1
+            yield
         
     def translate_text(self, text: str, source: str = "es", target: str = "en") -> str:
-        """Translate text with rate limiting and error handling"""
+        """Translate text with caching, rate limiting and error handling"""
         if not text.strip():
             return text
-            
-        # Rate limiting - wait 1.5 seconds between requests
-        current_time = time.time()
-        if current_time - self.last_request_time < 1.5:
-            time.sleep(1.5 - (current_time - self.last_request_time))
         
-        self.last_request_time = time.time()
-        self.request_count += 1
+        if self._skip_reason(text, source, target):
+            return text
         
-        try:
-            if self.service == "mymemory":
-                return self._translate_mymemory(text, source, target)
-            elif self.service == "googletrans":
-                return self._translate_googletrans(text, source, target)
-            elif self.service == "libre_fixed":
-                return self._translate_libre_fixed(text, source, target)
-            elif self.service == "translate_shell":
-                return self._translate_shell(text, source, target)
+        if len(text) > self._chunk_limit():
+            return self.translate_long_text(text, source, target)
+        
+        # Cache hits skip both the API call and the rate-limit wait
+        cached = self._cache_lookup(text, source, target)
+        if cached is not None:
+            return cached
+        
+        translated, provider = self._translate_uncached(text, source, target)
+        if provider is not None:
+            self._cache_store(text, source, target, translated, provider)
+        return translated
+    
+    def _identifier(self):
+        """Load the n-gram language identifier on first use"""
+        if self._language_identifier is None:
+            try:
+                from .langid import LanguageIdentifier
+            except ImportError:
+                logger.error("numpy not installed, language detection disabled. Install with: pip install numpy")
+                self.skip_language_check = True
+                return None
+            self._language_identifier = LanguageIdentifier()
+        return self._language_identifier
+    
+    def _skip_reason(self, text: str, source: str, target: str) -> Optional[str]:
+        """Decide whether text needs no translation, recording the decision
+        
+        Short text made up only of capitalised names and numbers (a lone
+        capitalised word is not enough) is left as-is unless the language
+        identifier confidently places it in the source language: a headline
+        such as "Adiós, Europa" detects as Spanish with high confidence, a
+        name such as "Pedro Sánchez" does not. Function words such as "de"
+        between names are ignored, but a capitalised one ("La OTAN", "The
+        Crown") marks an ordinary title-case headline. Text detected to
+        already be in the target language is left as-is too.
+        """
+        if self.skip_language_check:
+            return None
+        
+        reason = None
+        function_words = stopwords_for([language for language in (source, target) if language in STOPWORDS])
+        words = re.findall(r"[^\W\d_]+", text)
+        if any(word[0].isupper() and word.lower() in function_words for word in words):
+            names = []
+        else:
+            names = [word for word in words if word.lower() not in function_words]
+        identifier = self._identifier()
+        if (names and len(names) <= self.MAX_NAME_WORDS and all(word[0].isupper() for word in names) and
+                (len(names) > 1 or names[0].isupper())):
+            if identifier is None or source not in identifier.languages:
+                reason = "proper_nouns"
             else:
-                logger.warning(f"Unknown service {self.service}, using MyMemory")
-                return self._translate_mymemory(text, source, target)
-                
-        except Exception as e:
-            logger.error(f"Translation failed: {e}")
-            return text  # Return original text if translation fails
+                language, confidence = identifier.detect(text)
+                if language != source or confidence < self.LANGUAGE_CONFIDENCE:
+                    reason = "proper_nouns"
+        elif identifier is not None and target in identifier.languages:
+            language, confidence = identifier.detect(text)
+            if language == target and confidence >= self.LANGUAGE_CONFIDENCE:
+                reason = "already_target_language"
+        
+        if reason:
+            with self._stats_lock:
+                self.skipped_translations[text] = reason
+                self.skip_count += 1
+            logger.info(f"Skipping translation ({reason}): {text[:50]}")
+        return reason
     
-    def _translate_mymemory(self, text: str, source: str, target: str) -> str:
-        """Translate using MyMemory API (Free, reliable)"""
-        try:
-            # Split long text into chunks
-            if len(text) > 500:
-                text = text[:500] + "..."
-            
-            url = "https://api.mymemory.translated.net/get"
-            params = {
-                "q": text,
-                "langpair": f"{source}|{target}",
-                "de": "your-email@example.com"  # Optional email for higher limits
-            }
+    def skip_reason(self, text: str) -> Optional[str]:
+        """Why text was returned untranslated on purpose, or None"""
+        return self.skipped_translations.get(text)
+    
+    def _cache_lookup(self, text: str, source: str, target: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        # Entries are keyed by the provider that answered, so any provider in the chain may have one
+        providers = [self.service] if self.service == "translate_shell" else self._chain()
+        cached = self.cache.get(text, source, target, providers)
+        with self._stats_lock:
+            if cached is not None:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        return cached
+    
+    def _cache_store(self, text: str, source: str, target: str, translated: str, provider: str):
+        # Only real translations are stored so failures are retried next run; entries are
+        # keyed by the provider that answered, so fallback results are never served as
+        # the configured service's
+        if self.cache is not None and translated and translated.strip() != text.strip():
+            self.cache.put(text, source, target, provider, translated)
+    
+    def _translate_uncached(self, text: str, source: str, target: str) -> Tuple[str, Optional[str]]:
+        """Route text through the provider chain; each provider applies its own rate limit
+        
+        Returns the translation and the provider to cache it under, or None
+        when it must not be cached. Offline fallback translations are never
+        cached.
+        """
+        if self.service == "translate_shell":
+            return self._translate_shell(text, source, target), "translate_shell"
+        
+        if self.service not in self.FALLBACK_CHAINS:
+            logger.warning(f"Unknown service {self.service}, using MyMemory")
+        chain = self._chain()
+        
+        providers = {
+            "mymemory": self._translate_mymemory,
+            "googletrans": self._translate_googletrans,
+            "libre_fixed": self._translate_libre_fixed,
+        }
+        provider, translated = self._call_routed(chain, providers, text, source, target)
+        if translated is not None:
+            return translated, provider
+        
+        if self.router.all_open(chain):
+            # Every remote provider is unavailable: answer offline instead of waiting
+            return self._translate_shell(text, source, target), None
+        
+        logger.error(f"Translation failed with all available providers")
+        return text, None  # Return original text if translation fails
+    
+    def _chain(self) -> List[str]:
+        """Fallback chain for the configured service, limited to allowed providers"""
+        chain = self.FALLBACK_CHAINS.get(self.service, self.FALLBACK_CHAINS["mymemory"])
+        if self.providers is not None:
+            chain = [provider for provider in chain if provider in self.providers]
+        return chain
+    
+    def _call_routed(self, chain: List[str], providers: dict, *args):
+        """Try providers healthiest-first, recording each outcome with the router
+        
+        Providers raise on transport or API errors (counted as failures) and
+        return None when they answered without a usable result, which moves on
+        to the next provider without penalising the one that answered. Returns
+        (provider, result), or (None, None) when no provider had a result.
+        """
+        routed = self.router.route(chain)
+        if not routed:
+            logger.warning(f"All translation providers in {chain} have open circuits")
+        
+        for position, provider in enumerate(routed):
+            started = time.monotonic()
+            try:
+                with tracer.span("translate.provider", provider=provider):
+                    result = providers[provider](*args)
+            except Exception as e:
+                self.router.record_failure(provider, time.monotonic() - started)
+                logger.error(f"{provider} failed: {e}")
+                continue
             
+            self.router.record_success(provider, time.monotonic() - started)
+            if result is not None:
+                self.router.release(routed[position + 1:])
+                return provider, result
+        return None, None
+    
+    def _translate_mymemory(self, text: str, source: str, target: str) -> Optional[str]:
+        """Translate using MyMemory API (Free, reliable)"""
+        import requests
+        
+        url = self.endpoints["mymemory"]
+        params = {
+            "q": text,
+            "langpair": f"{source}|{target}",
+            "de": "your-email@example.com"  # Optional email for higher limits
+        }
+        
+        with self._provider_slot("mymemory"):
             response = requests.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get("responseStatus") == 200:
-                translated_text = data["responseData"]["translatedText"]
-                if translated_text and translated_text.lower() != text.lower():
-                    logger.info(f"Successfully translated with MyMemory")
-                    return translated_text
-                    
-        except Exception as e:
-            logger.error(f"MyMemory API failed: {e}")
-        
-        # Fallback to googletrans
-        return self._translate_googletrans(text, source, target)
-    
-    def _translate_googletrans(self, text: str, source: str, target: str) -> str:
+        data = self._mymemory_data(response)
+        translated_text = data["responseData"]["translatedText"]
+        if translated_text and translated_text.lower() != text.lower():
+            logger.info(f"Successfully translated with MyMemory")
+            return translated_text
+        return None
+    
+    @staticmethod
+    def _mymemory_data(response) -> dict:
+        """Response body of a MyMemory call, raising on errors it reports with HTTP 200
+        
+        Quota exhaustion, rate limiting and invalid language pairs come back
+        as a responseStatus in the body; raising lets the router count them
+        as failures and open the circuit.
+        """
+        response.raise_for_status()
+        data = response.json()
+        status = data.get("responseStatus")
+        if str(status) != "200":
+            raise RuntimeError(f"MyMemory responseStatus {status}: {data.get('responseDetails')}")
+        return data
+    
+    def _googletrans(self):
+        """Reuse one googletrans client instead of building one per call"""
+        if self._googletrans_translator is None:
+            try:
+                from googletrans import Translator
+            except ImportError:
+                logger.error("googletrans library not installed. Install with: pip install googletrans==4.0.0rc1")
+                raise
+            self._googletrans_translator = Translator()
+        return self._googletrans_translator
+    
+    def _translate_googletrans(self, text: str, source: str, target: str) -> Optional[str]:
         """Translate using googletrans library (Free, unofficial)"""
-        try:
-            from googletrans import Translator
-            translator = Translator()
-            
-            result = translator.translate(text, src=source, dest=target)
-            if result and result.text:
-                logger.info(f"Successfully translated with googletrans")
-                return result.text
-                
-        except ImportError:
-            logger.error("googletrans library not installed. Install with: pip install googletrans==4.0.0rc1")
-        except Exception as e:
-            logger.error(f"googletrans failed: {e}")
+        translator = self._googletrans()
         
-        return self._translate_libre_fixed(text, source, target)
+        with self._provider_slot("googletrans"):
+            result = translator.translate(text, src=source, dest=target)
+        if result and result.text:
+            logger.info(f"Successfully translated with googletrans")
+            return result.text
+        return None
     
-    def _translate_libre_fixed(self, text: str, source: str, target: str) -> str:
+    def _translate_libre_fixed(self, text: str, source: str, target: str) -> Optional[str]:
         """Fixed LibreTranslate with proper API format"""
-        try:
-            # Use the official LibreTranslate demo instance
-            url = "https://libretranslate.de/translate"
-            
-            payload = {
-                "q": text,
-                "source": source,
-                "target": target,
-                "format": "text",
-                "alternatives": 1,
-                "api_key": ""
-            }
-            
-            headers = {
-                "Content-Type": "application/json",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-            
+        import requests
+        
+        url = self.endpoints["libre_fixed"]
+        
+        payload = {
+            "q": text,
+            "source": source,
+            "target": target,
+            "format": "text",
+            "alternatives": 1,
+            "api_key": ""
+        }
+        
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+        
+        with self._provider_slot("libre_fixed"):
             response = requests.post(
                 url, 
                 data=json.dumps(payload), 
                 headers=headers, 
                 timeout=15
             )
-            
-            if response.status_code == 200:
-                try:
-                    data = response.json()
-                    translated_text = data.get("translatedText", "").strip()
-                    if translated_text and translated_text != text:
-                        logger.info(f"Successfully translated with LibreTranslate")
-                        return translated_text
-                except json.JSONDecodeError:
-                    logger.warning("LibreTranslate returned invalid JSON")
-            
-        except Exception as e:
-            logger.error(f"LibreTranslate fixed API failed: {e}")
+        response.raise_for_status()
         
-        return text
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            logger.warning("LibreTranslate returned invalid JSON")
+            raise
+        
+        translated_text = data.get("translatedText", "").strip()
+        if translated_text and translated_text != text:
+            logger.info(f"Successfully translated with LibreTranslate")
+            return translated_text
+        return None
     
     def _translate_shell(self, text: str, source: str, target: str) -> str:
-        """Basic translation using simple word mappings as final fallback"""
-        # Simple dictionary for common Spanish words
-        simple_translations = {
-            "un": "a", "una": "a", "el": "the", "la": "the", "los": "the", "las": "the",
-            "proyecto": "project", "falto": "lacking", "de": "of", "ambición": "ambition",
-            "miseria": "misery", "en": "in", "cuba": "cuba",
-            "no": "don't", "olvidar": "forget", "que": "that", "centroamérica": "central america", "existe": "exists",
-            "lenguas": "tongues", "podridas": "rotten",
-            "aquel": "that", "verano": "summer", "raro": "weird", "extraño": "strange"
+        """Offline phrase-table translation, used as the zero-latency fallback"""
+        engine = PhraseTableTranslator.for_pair(source, target)
+        if engine is None:
+            logger.warning(f"No offline phrase table for {source}->{target}")
+            return text
+        
+        logger.info(f"Used offline phrase-table translation")
+        return engine.translate(text)
+    
+    @staticmethod
+    def _pack_segments(segments: List[str], max_chars: int) -> List[List[str]]:
+        """Group segments into packs whose joined length stays within max_chars"""
+        packs = []
+        current = []
+        current_length = 0
+        for segment in segments:
+            added_length = len(segment) + (1 if current else 0)
+            if current and current_length + added_length > max_chars:
+                packs.append(current)
+                current = []
+                added_length = len(segment)
+                current_length = 0
+            current.append(segment)
+            current_length += added_length
+        if current:
+            packs.append(current)
+        return packs
+    
+    @staticmethod
+    def _valid_split(segments: List[str], translations) -> bool:
+        """A packed response is only trusted if it maps one-to-one onto the segments"""
+        return (isinstance(translations, list) and len(translations) == len(segments) and
+                all(isinstance(t, str) and t.strip() for t in translations))
+    
+    def _translate_packed_mymemory(self, segments: List[str], source: str, target: str) -> Optional[List[str]]:
+        """Send newline-delimited segments in one MyMemory request"""
+        import requests
+        
+        url = self.endpoints["mymemory"]
+        params = {
+            "q": "\n".join(segments),
+            "langpair": f"{source}|{target}",
+            "de": "your-email@example.com"
         }
+        with self._provider_slot("mymemory"):
+            response = requests.get(url, params=params, timeout=15)
+        data = self._mymemory_data(response)
+        translated_text = data["responseData"]["translatedText"] or ""
+        return self._split_checked(segments, [line.strip() for line in translated_text.split("\n")])
+    
+    def _translate_packed_googletrans(self, segments: List[str], source: str, target: str) -> Optional[List[str]]:
+        """googletrans accepts a list and returns one result per item"""
+        translator = self._googletrans()
         
-        words = text.lower().split()
-        translated_words = []
+        with self._provider_slot("googletrans"):
+            results = translator.translate(segments, src=source, dest=target)
+        return self._split_checked(segments, [result.text for result in results])
+    
+    def _translate_packed_libre(self, segments: List[str], source: str, target: str) -> Optional[List[str]]:
+        """LibreTranslate accepts an array for q and answers with an array"""
+        import requests
         
-        for word in words:
-            # Remove punctuation
-            clean_word = word.strip(".,!?()[]'\"")
-            if clean_word in simple_translations:
-                translated_words.append(simple_translations[clean_word])
-            else:
-                translated_words.append(word)
+        url = self.endpoints["libre_fixed"]
+        payload = {
+            "q": segments,
+            "source": source,
+            "target": target,
+            "format": "text",
+            "api_key": ""
+        }
+        headers = {
+            "Content-Type": "application/json",
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        }
+        with self._provider_slot("libre_fixed"):
+            response = requests.post(url, data=json.dumps(payload), headers=headers, timeout=15)
+        response.raise_for_status()
+        
+        translated = response.json().get("translatedText")
+        if isinstance(translated, list):
+            return self._split_checked(segments, [t.strip() for t in translated])
+        return None
+    
+    def _split_checked(self, segments: List[str], translations: List[str]) -> Optional[List[str]]:
+        if self._valid_split(segments, translations):
+            return translations
+        logger.warning(f"Packed response did not line up with {len(segments)} segments")
+        return None
+    
+    def _translate_pack(self, segments: List[str], source: str, target: str) -> List[str]:
+        """Translate one pack through the fallback chain, splitting back per segment
+        
+        If no provider returns a response that lines up with the segments, the
+        pack falls back to one translate_text call per segment.
+        """
+        packed_providers = {
+            "mymemory": self._translate_packed_mymemory,
+            "googletrans": self._translate_packed_googletrans,
+            "libre_fixed": self._translate_packed_libre,
+        }
+        
+        if len(segments) > 1:
+            chain = self._chain()
+            provider, translations = self._call_routed(chain, packed_providers, segments, source, target)
+            if translations is not None:
+                logger.info(f"Translated {len(segments)} segments in one packed request")
+                for segment, translated in zip(segments, translations):
+                    self._cache_store(segment, source, target, translated, provider)
+                return translations
+        
+        return [self._translate_and_store(segment, source, target) for segment in segments]
+    
+    def _translate_and_store(self, text: str, source: str, target: str) -> str:
+        if len(text) > self._chunk_limit():
+            return self.translate_long_text(text, source, target)
+        translated, provider = self._translate_uncached(text, source, target)
+        if provider is not None:
+            self._cache_store(text, source, target, translated, provider)
+        return translated
+    
+    def _chunk_limit(self) -> int:
+        """Largest text every provider in the configured chain accepts in one request"""
+        chain = self._chain()
+        return min((TRANSLATION_PACK_LIMITS[provider] for provider in chain), default=500)
+    
+    @staticmethod
+    def split_sentences(text: str, max_chars: int) -> List[str]:
+        """Split text on sentence boundaries into pieces of at most max_chars
+        
+        Sentences that are still too long are split on clause punctuation and
+        finally on whitespace.
+        """
+        pieces = []
+        for sentence in re.split(r'(?<=[.!?…»])\s+', text.strip()):
+            if len(sentence) <= max_chars:
+                pieces.append(sentence)
+                continue
+            
+            parts = []
+            for clause in re.split(r'(?<=[,;:])\s+', sentence):
+                parts.extend([clause] if len(clause) <= max_chars else clause.split())
+            
+            current = ""
+            for part in parts:
+                candidate = f"{current} {part}" if current else part
+                if len(candidate) <= max_chars:
+                    current = candidate
+                    continue
+                if current:
+                    pieces.append(current)
+                # A single unbreakable run longer than the limit is hard-split
+                while len(part) > max_chars:
+                    pieces.append(part[:max_chars])
+                    part = part[max_chars:]
+                current = part
+            if current:
+                pieces.append(current)
+        return [piece for piece in pieces if piece]
+    
+    def translate_long_text(self, text: str, source: str = "es", target: str = "en",
+                            max_workers: Optional[int] = None) -> str:
+        """Translate text of any length, such as a full article body
         
-        result = " ".join(translated_words)
+        Paragraphs are split into sentences sized for the provider chain.
+        Repeated sentences are translated once. The unique sentences go
+        through translate_batch, so they use the cache, packing and
+        per-provider rate limits, and are then reassembled in order.
+        """
+        limit = self._chunk_limit()
+        paragraphs = [self.split_sentences(paragraph, limit) for paragraph in text.split("\n")]
+        sentences = [sentence for paragraph in paragraphs for sentence in paragraph]
+        if not sentences:
+            return text
         
-        # Capitalize first letter
-        if result:
-            result = result[0].upper() + result[1:]
+        unique = list(dict.fromkeys(sentences))
+        logger.info(f"Translating long text: {len(text)} characters, {len(sentences)} sentences "
+                   f"({len(unique)} unique)")
+        translated = dict(zip(unique, self.translate_batch(unique, source, target, max_workers=max_workers)))
         
-        logger.info(f"Used simple dictionary translation")
-        return result
+        return "\n".join(" ".join(translated[sentence] for sentence in paragraph)
+                         for paragraph in paragraphs)
     
-    def translate_batch(self, texts: List[str], source: str = "es", target: str = "en") -> List[str]:
-        """Translate multiple texts with progress logging"""
-        results = []
+    def _default_workers(self) -> int:
+        if self.workers is not None:
+            return max(1, self.workers)
+        return max(limiter.concurrency for limiter in self.limiters.values())
+    
+    def translate_batch(self, texts: List[str], source: str = "es", target: str = "en",
+                        max_workers: Optional[int] = None,
+                        progress_callback: Optional[Callable[[int, int, str, str], None]] = None,
+                        pack: bool = True) -> List[str]:
+        """Translate multiple texts concurrently, returning results in input order
+        
+        Requests run on a worker pool and are throttled by each provider's token
+        bucket, so throughput is bounded by provider quotas rather than a fixed
+        gap per text. Duplicate texts are translated once. With pack=True, short
+        uncached texts are packed into multi-segment provider requests.
+        progress_callback, if given, is called as (completed, total, text,
+        translation).
+        """
         total = len(texts)
+        unique_texts = list(dict.fromkeys(texts))
+        if max_workers is None:
+            max_workers = self._default_workers()
         
-        logger.info(f"Starting batch translation of {total} texts...")
+        logger.info(f"Starting batch translation of {total} texts "
+                   f"({len(unique_texts)} unique, {max_workers} workers)...")
         
-        for i, text in enumerate(texts, 1):
-            logger.info(f"Translating {i}/{total}: {text[:50]}...")
-            translated = self.translate_text(text, source, target)
-            results.append(translated)
+        translations = {}
+        jobs = []
+        completed = 0
+        for text in unique_texts:
+            if not text.strip() or self._skip_reason(text, source, target):
+                cached = text
+            else:
+                cached = self._cache_lookup(text, source, target)
+            if cached is None:
+                jobs.append(text)
+                continue
+            translations[text] = cached
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, len(unique_texts), text, cached)
+        
+        pack_limit = TRANSLATION_PACK_LIMITS.get(self.service)
+        if pack and pack_limit and len(jobs) > 1:
+            normalized = {}
+            for text in jobs:
+                normalized.setdefault(TranslationCache.normalize(text), []).append(text)
+            short = [segment for segment in normalized if len(segment) <= pack_limit]
+            packs = self._pack_segments(short, pack_limit)
+            packs += [[segment] for segment in normalized if len(segment) > pack_limit]
+        else:
+            normalized = {text: [text] for text in jobs}
+            packs = [[text] for text in jobs]
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {}
+            for segments in packs:
+                if len(segments) == 1:
+                    future = executor.submit(lambda s: [self._translate_and_store(s, source, target)], segments[0])
+                else:
+                    future = executor.submit(self._translate_pack, segments, source, target)
+                futures[future] = segments
             
-            if i % 5 == 0 or i == total:
-                logger.info(f"Progress: {i}/{total} completed")
+            for future in as_completed(futures):
+                segments = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.error(f"Translation failed for {len(segments)} segments: {e}")
+                    results = [None] * len(segments)
+                
+                for segment, translated in zip(segments, results):
+                    for text in normalized[segment]:
+                        translations[text] = translated if translated is not None else text
+                        completed += 1
+                        if progress_callback:
+                            progress_callback(completed, len(unique_texts), text, translations[text])
+                logger.info(f"Progress: {completed}/{len(unique_texts)} completed")
+        
+        logger.info(f"Batch translation completed. {self.request_count} API requests made, "
+                   f"{self.cache_hits} cache hits, {self.cache_misses} cache misses.")
+        logger.info(f"Translation provider health: {self.router.snapshot()}")
+        return [translations[text] for text in texts]
+
+    def submit(self, text: str, source: str = "es", target: str = "en") -> Future:
+        """Queue a text for background translation and return a Future
+        
+        Lets callers start translating titles while slower work, such as
+        loading article pages, is still running.
+        """
+        return self.submit_batch([text], source, target)[text]
+    
+    def submit_batch(self, texts: List[str], source: str = "es", target: str = "en",
+                     pack: bool = True) -> dict:
+        """Queue texts for one background translate_batch call and return {text: Future}
         
-        logger.info(f"Batch translation completed. {self.request_count} API requests made.")
-        return results
+        The texts are packed into multi-segment requests like any batch, and
+        each Future resolves as soon as its own translation is done.
+        """
+        futures = {text: Future() for text in dict.fromkeys(texts)}
+        
+        def resolve(_completed, _total, text, translation):
+            if not futures[text].done():
+                futures[text].set_result(translation)
+        
+        def run():
+            try:
+                self.translate_batch(list(futures), source, target, progress_callback=resolve, pack=pack)
+            except Exception as e:
+                for future in futures.values():
+                    if not future.done():
+                        future.set_exception(e)
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._default_workers(), thread_name_prefix="translate")
+        self._executor.submit(run)
+        return futures
+    
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """Stop the background translation workers started by submit and submit_batch"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=cancel_pending)
+            self._executor = None
 
 # Convenience function for backward compatibility
 def translate_text(text: str, source: str = "es", target: str = "en") -> str:
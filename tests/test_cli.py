@@ -0,0 +1,67 @@
+import main
+
+
+def test_translate_shell_provider_can_be_selected(tmp_path):
+    args = main.build_parser().parse_args(
+        ["translate", "--provider", "translate_shell", "--cache-dir", str(tmp_path)])
+    translator = main.make_translator(args)
+    try:
+        assert translator.service == "translate_shell"
+        translator.skip_language_check = True
+        assert translator.translate_text("la crisis") != "la crisis"
+        assert translator.request_count == 0
+    finally:
+        translator.shutdown()
+
+
+
+def test_translate_bodies_stores_content_translations(tmp_path):
+    db = str(tmp_path / "articles.sqlite3")
+    store = main.ArticleStore(db)
+    store.upsert({"url": "https://elpais.com/opinion/2024-01-01/a.html", "title": "La crisis del verano",
+                  "content": "El gobierno aprueba la ley de presupuestos.\nLa oposición vota en contra."})
+    store.close()
+
+    args = main.build_parser().parse_args(
+        ["translate", "--bodies", "--provider", "translate_shell", "--db", db, "--cache-dir", str(tmp_path)])
+    main.run_translate(args)
+
+    store = main.ArticleStore(db)
+    try:
+        [row] = store.query()
+    finally:
+        store.close()
+    assert row["translated_title"] is not None
+    assert row["translated_content"].count("\n") == 1
+    assert row["translated_content"] != row["content"]
+
+
+def test_import_loads_article_dumps_into_the_store(tmp_path):
+    sink = main.JsonlSink(str(tmp_path / "elpais_enhanced_data_articles_20240101.jsonl"))
+    for n in range(3):
+        sink.write({"url": f"https://elpais.com/opinion/2024-01-0{n + 1}/a.html", "title": f"Artículo {n}",
+                    "content": "Texto", "translated_title": f"Article {n}"})
+    sink.close()
+
+    db = str(tmp_path / "articles.sqlite3")
+    args = main.build_parser().parse_args(
+        ["import", "--db", db, "--pattern", str(tmp_path / "elpais_*articles_*.json*")])
+    main.run_import(args)
+
+    store = main.ArticleStore(db)
+    try:
+        rows = store.query()
+    finally:
+        store.close()
+    assert sorted(row["translated_title"] for row in rows) == ["Article 0", "Article 1", "Article 2"]
+
+
+def test_translate_workers_sizes_the_background_pool(tmp_path):
+    args = main.build_parser().parse_args(
+        ["translate", "--provider", "translate_shell", "--translate-workers", "3", "--cache-dir", str(tmp_path)])
+    translator = main.make_translator(args)
+    try:
+        translator.submit_batch(["la crisis"])["la crisis"].result(timeout=10)
+        assert translator._executor._max_workers == 3
+    finally:
+        translator.shutdown()
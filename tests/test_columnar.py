@@ -0,0 +1,19 @@
+from scraper.columnar import ColumnarArchive
+
+
+def record(url, score):
+    return {"url": url, "title": "Título", "content": "Texto", "content_score": score,
+            "extraction_method": "css", "section": "opinion"}
+
+
+def test_newest_row_per_url_is_kept_across_partitions(tmp_path):
+    archive = ColumnarArchive(str(tmp_path), "npy")
+    urls = [f"https://elpais.com/opinion/2024-01-01/articulo-{n}.html" for n in range(1000)]
+    archive.append([record(url, 1.0) for url in urls])
+    archive.append([record(urls[0], 2.0)])
+
+    assert archive.column("url_hash").dtype.name == "uint64"
+    assert len(set(archive.column("url_hash", history=True).tolist())) == len(urls)
+    scores = ColumnarArchive(str(tmp_path)).column("content_score")
+    assert len(scores) == len(urls)
+    assert sorted(scores.tolist())[-1] == 2.0
@@ -0,0 +1,44 @@
+import os
+
+from scraper.mock_server import MockTranslationServer
+from scraper.translate import TranslationCache, TranslationService
+
+
+def make_service(endpoints, cache):
+    service = TranslationService(service="mymemory", cache=cache, endpoints=endpoints,
+                                 providers=["mymemory", "libre_fixed"])
+    service.skip_language_check = True
+    return service
+
+
+def test_fallback_translation_is_served_from_cache_on_the_next_run(tmp_path):
+    titles = ["El gobierno aprueba la ley", "La crisis del verano"]
+    with MockTranslationServer() as server:
+        # MyMemory answers 404, so LibreTranslate does the translating
+        endpoints = dict(server.endpoints, mymemory=f"{server.base_url}/missing")
+        cache_path = os.path.join(tmp_path, "translations.sqlite3")
+
+        cache = TranslationCache(cache_path)
+        first = make_service(endpoints, cache)
+        first_run = [first.translate_text(title) for title in titles]
+        cache.close()
+        assert server.request_counts["libre"] == len(titles)
+        assert first.cache_hits == 0
+
+        cache = TranslationCache(cache_path)
+        second = make_service(endpoints, cache)
+        second_run = [second.translate_text(title) for title in titles]
+        cache.close()
+
+    assert second_run == first_run
+    assert second.cache_hits == len(titles)
+    assert second.request_count == 0
+    assert server.request_counts["libre"] == len(titles)
+
+
+def test_spanish_proper_nouns_are_skipped_but_title_case_headlines_are_not():
+    service = TranslationService(use_cache=False)
+    assert service._skip_reason("Pedro Sánchez", "es", "en") == "proper_nouns"
+    assert service.skip_reason("Pedro Sánchez") == "proper_nouns"
+    for headline in ("La OTAN", "El Rey", "Adiós, Europa", "El Gobierno aprueba la ley"):
+        assert service._skip_reason(headline, "es", "en") is None